@@ -0,0 +1,153 @@
+"""Animation clips shared by every entity, and the pass that advances every animation once per update."""
+from config import *
+
+# Clips of the game: spritesheet attribute of Game, frame size, first frame, frame count, speed in frames per update,
+# position where the clip ends, position it loops back to (None plays it once), entity method called when a clip
+# played once ends, and entity methods called when a frame is reached.
+CLIP_DEFINITIONS = {
+    'player_walk_down': ('character_spritesheet', PLAYERSIZE, 0, 6, 0.08, 4, 1, None, None),
+    'player_walk_up': ('character_spritesheet', PLAYERSIZE, 6, 6, 0.08, 4, 1, None, None),
+    'player_walk_right': ('character_spritesheet', PLAYERSIZE, 12, 6, 0.08, 4, 1, None, None),
+    'player_walk_left': ('character_spritesheet', PLAYERSIZE, 18, 6, 0.08, 4, 1, None, None),
+    'player_idle_down': ('character_spritesheet', PLAYERSIZE, 24, 5, 0.08, 5, 1, None, None),
+    'player_idle_up': ('character_spritesheet', PLAYERSIZE, 29, 5, 0.08, 5, 1, None, None),
+    'player_idle_right': ('character_spritesheet', PLAYERSIZE, 34, 5, 0.08, 5, 1, None, None),
+    'player_idle_left': ('character_spritesheet', PLAYERSIZE, 39, 5, 0.08, 5, 1, None, None),
+
+    'enemy_walk_down': ('enemy_spritesheet', TILESIZE, 0, 5, 0.1, 5, 1, None, None),
+    'enemy_walk_up': ('enemy_spritesheet', TILESIZE, 5, 5, 0.1, 5, 1, None, None),
+    'enemy_walk_right': ('enemy_spritesheet', TILESIZE, 10, 6, 0.1, 5, 1, None, None),
+    'enemy_walk_left': ('enemy_spritesheet', TILESIZE, 16, 6, 0.1, 5, 1, None, None),
+    # An enemy that did not move this update shows the first frame of its walk, without advancing.
+    'enemy_still_down': ('enemy_spritesheet', TILESIZE, 0, 1, 0, None, None, None, None),
+    'enemy_still_up': ('enemy_spritesheet', TILESIZE, 5, 1, 0, None, None, None, None),
+    'enemy_still_right': ('enemy_spritesheet', TILESIZE, 10, 1, 0, None, None, None, None),
+    'enemy_still_left': ('enemy_spritesheet', TILESIZE, 16, 1, 0, None, None, None, None),
+    'enemy_death': ('enemy_spritesheet', TILESIZE, 22, 9, 0.1, 9, None, 'kill', None),
+
+    'attack_down': ('attack_spritesheet', PLAYERSIZE, 0, 7, 0.2, 7, None, 'kill', {1: 'play_sound'}),
+    'attack_up': ('attack_spritesheet', PLAYERSIZE, 7, 7, 0.2, 7, None, 'kill', {1: 'play_sound'}),
+    'attack_left': ('attack_spritesheet', PLAYERSIZE, 14, 7, 0.2, 7, None, 'kill', {1: 'play_sound'}),
+    'attack_right': ('attack_spritesheet', PLAYERSIZE, 21, 7, 0.2, 7, None, 'kill', {1: 'play_sound'}),
+}
+
+
+class Clip:
+    """The frames and timing of an animation, shared by every entity that plays it."""
+
+    def __init__(self, frames, rate, end=None, loop_to=None, on_end=None, events=None):
+        """Constructor of the clip.
+
+        Args:
+            frames (list): The pygame.Surface of each frame.
+            rate (float): How many frames the animation advances each update.
+            end (float): The position where the clip ends. Defaults to the number of frames.
+            loop_to (float): The position the clip goes back to at the end. None plays the clip once.
+            on_end (str): Method of the entity called when a clip played once ends, like 'kill'.
+            events (dict): Method of the entity called when each frame is reached, by frame number.
+        """
+        self.frames = frames
+        self.rate = rate
+        self.end = len(frames) if end is None else end
+        self.loop_to = loop_to
+        self.on_end = on_end
+        self.events = events
+
+
+def load_clips(game):
+    """Builds every clip of CLIP_DEFINITIONS from the spritesheets of the game.
+
+    Args:
+        game (game.Game): A reference for the Game class.
+
+    Returns:
+        dict: The Clip of each name.
+    """
+    clips = {}
+    for name, (sheet, size, first, count, rate, end, loop_to, on_end, events) in CLIP_DEFINITIONS.items():
+        spritesheet = getattr(game, sheet)
+        frames = [spritesheet.get_sprite((first + i) * size, 0, size, size) for i in range(count)]
+        clips[name] = Clip(frames, rate, end, loop_to, on_end, events)
+    return clips
+
+
+class Playback:
+    """What an entity is playing: the clip and the position in it. The only animation state kept per entity."""
+
+    __slots__ = ('entity', 'clip', 'position')
+
+    def __init__(self, entity, clip, position=0):
+        self.entity = entity
+        self.clip = clip
+        self.position = position
+
+    def play(self, clip):
+        """Switches to another clip, keeping the position, like a walk that continues in another direction.
+
+        Args:
+            clip (Clip): The clip to play.
+        """
+        self.clip = clip
+
+    def stop(self):
+        """Stops the playback for good, even if its entity is added to the groups again, like pooled sprites are."""
+        self.entity = None
+
+
+class Animator:
+    """Advances the animation of every entity in a single pass, once per update.
+
+    Entities only pick their clip in their update, so there is no per-entity animate call and no frame list.
+    """
+
+    def __init__(self):
+        self.playbacks = []
+
+    def add(self, entity, clip, position=0):
+        """Starts animating an entity. It stops when the entity is killed, or when the playback is stopped.
+
+        Args:
+            entity (pygame.sprite.Sprite): The entity, whose image is set on each update.
+            clip (Clip): The first clip played.
+            position (float): The first position in the clip.
+
+        Returns:
+            Playback: The playback state of the entity, to change its clip.
+        """
+        playback = Playback(entity, clip, position)
+        self.playbacks.append(playback)
+        return playback
+
+    def advance(self):
+        """Shows the current frame of every entity, then moves its animation forward.
+           Clips that end loop back, or call the on_end method of their entity.
+        """
+        playing = []
+        for playback in self.playbacks:
+            entity = playback.entity
+            if entity is None or not entity.alive():
+                continue
+            clip = playback.clip
+            if not clip.rate:
+                # Still clips show their first frame and keep the position for the next clip.
+                entity.image = clip.frames[0]
+                playing.append(playback)
+                continue
+            frame = int(playback.position)
+            entity.image = clip.frames[frame]
+            position = playback.position + clip.rate
+            if position >= clip.end:
+                if clip.loop_to is None:
+                    playback.position = position
+                    getattr(entity, clip.on_end)()
+                    if not entity.alive():
+                        continue
+                else:
+                    position = clip.loop_to
+            playback.position = position
+            if clip.events and int(position) != frame:
+                event = clip.events.get(int(position))
+                if event is not None:
+                    getattr(entity, event)()
+            playing.append(playback)
+        self.playbacks = playing
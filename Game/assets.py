@@ -0,0 +1,423 @@
+"""Shared asset caches."""
+import hashlib
+import json
+import mmap
+import os
+import pygame
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+
+
+def atomic_write(path, data):
+    """Writes a file through a temporary file in the same directory, so a crash never leaves it half written,
+       and readers see either the old file or the new one.
+
+    Args:
+        path (str): The path of the file.
+        data (bytes): The content of the file.
+    """
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class FrameCache:
+    """Process-wide cache of sprite frames cut out of spritesheets.
+
+    Frames are keyed by the sheet file and the rect inside it, so every entity asking for the
+    same frame gets the same pygame.Surface instead of a private copy.
+    """
+
+    def __init__(self, max_size=None):
+        """Constructor of the frame cache.
+
+        Args:
+            max_size (int): The maximum number of frames kept. None keeps every frame.
+        """
+        self.max_size = max_size
+        self.frames = OrderedDict()
+        # Levels are built in a background thread, which also asks for frames.
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Returns the cached frame for the key, building it on a miss.
+
+        Args:
+            key (tuple): The (sheet, x, y, width, height) key of the frame.
+            build (callable): Function that creates the frame surface when it is not cached.
+
+        Returns:
+            pygame.Surface: The shared frame.
+        """
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is not None:
+                self.hits += 1
+                # Most recently used frames go to the end, the first one is evicted.
+                self.frames.move_to_end(key)
+                return frame
+
+            self.misses += 1
+
+        # Building can wait for an image still decoding, so the lock is not held meanwhile.
+        frame = build()
+        with self.lock:
+            # Another thread may have built the same frame meanwhile, only the first one is kept.
+            frame = self.frames.setdefault(key, frame)
+            if self.max_size is not None and len(self.frames) > self.max_size:
+                self.frames.popitem(last=False)
+            return frame
+
+    def clear(self):
+        """Drops every cached frame."""
+        with self.lock:
+            self.frames.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class SoundRegistry:
+    """Decodes every sound clip once and hands out the shared pygame.mixer.Sound objects.
+
+    When a cache directory is given, the decoded PCM samples are also saved there, so later
+    starts read the raw samples back instead of decoding the compressed file again.
+    """
+
+    def __init__(self, cache_dir=None):
+        """Constructor of the sound registry.
+
+        Args:
+            cache_dir (str): Directory for the decoded PCM cache. None disables the disk cache.
+        """
+        self.cache_dir = cache_dir
+        self.sounds = {}
+        # Sounds are preloaded in the background, while the game may already ask for them.
+        self.lock = threading.RLock()
+
+    def get(self, path):
+        """Returns the shared sound for the file, decoding it on the first request.
+
+        Args:
+            path (str): The path of the sound file.
+
+        Returns:
+            pygame.mixer.Sound: The shared sound.
+        """
+        with self.lock:
+            sound = self.sounds.get(path)
+            if sound is None:
+                sound = self.load(path)
+                self.sounds[path] = sound
+            return sound
+
+    def preload(self, paths):
+        """Decodes a list of sounds ahead of time.
+
+        Args:
+            paths (list): The paths of the sound files.
+        """
+        for path in paths:
+            self.get(path)
+
+    def load(self, path):
+        """Loads a sound from the PCM cache, or decodes it and fills the cache.
+
+        Args:
+            path (str): The path of the sound file.
+
+        Returns:
+            pygame.mixer.Sound: The loaded sound.
+        """
+        if self.cache_dir is None:
+            return pygame.mixer.Sound(path)
+
+        cache_path = self.cache_path(path)
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return pygame.mixer.Sound(buffer=f.read())
+
+        sound = pygame.mixer.Sound(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atomic_write(cache_path, sound.get_raw())
+        except OSError as e:
+            print(f"Could not write the sound cache for {path}: {e}")
+        return sound
+
+    def cache_path(self, path):
+        """Builds the PCM cache file path for a sound.
+           The name depends on the source file and on the mixer format, so the cache is rebuilt
+           when the sound file changes or the mixer is opened with other settings.
+
+        Args:
+            path (str): The path of the sound file.
+
+        Returns:
+            str: The path of the cached PCM samples.
+        """
+        stat = os.stat(path)
+        key = f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{pygame.mixer.get_init()}'
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.pcm')
+
+    def clear(self):
+        """Drops every loaded sound."""
+        with self.lock:
+            self.sounds.clear()
+
+
+class ImageLoader:
+    """Decodes and converts images on a thread pool, so they load in parallel and before they are needed.
+
+    Images are converted to the display format, so they can only be requested after the display mode is set.
+    """
+
+    def __init__(self, workers):
+        """Constructor of the image loader.
+
+        Args:
+            workers (int): How many images are decoded at the same time. None uses one thread per CPU core, up to 4.
+        """
+        if workers is None:
+            # More threads than cores only make the first images, which are the most needed, take longer.
+            workers = min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asset-loader')
+        self.images = {}
+        self.lock = threading.Lock()
+
+    def request(self, path):
+        """Starts loading an image in the background, unless it was already requested.
+
+        Args:
+            path (str): The path of the image file.
+
+        Returns:
+            concurrent.futures.Future: The future of the loaded pygame.Surface.
+        """
+        with self.lock:
+            image = self.images.get(path)
+            if image is None:
+                image = self.executor.submit(self.decode, path)
+                self.images[path] = image
+            return image
+
+    def preload(self, paths):
+        """Starts loading a list of images in the background, in order.
+
+        Args:
+            paths (list): The paths of the image files.
+        """
+        for path in paths:
+            self.request(path)
+
+    def get(self, path):
+        """Returns the loaded image, waiting for it if it is still loading.
+
+        Args:
+            path (str): The path of the image file.
+
+        Returns:
+            pygame.Surface: The shared image.
+        """
+        return self.request(path).result()
+
+    def submit(self, function, *args):
+        """Runs another loading task on the pool, like preloading the sounds.
+
+        Args:
+            function (callable): The task.
+            *args: The arguments of the task.
+
+        Returns:
+            concurrent.futures.Future: The future of the task.
+        """
+        return self.executor.submit(function, *args)
+
+    def decode(self, path):
+        return pygame.image.load(path).convert()
+
+    def clear(self):
+        """Drops every loaded image."""
+        with self.lock:
+            self.images.clear()
+
+
+class FrameBundle:
+    """Sprite frames pre-sliced by build_bundle.py, read from a memory-mapped raw pixel file.
+
+    Each frame is a pygame.image.frombuffer surface over its bytes in the map, so no PNG is decoded and nothing
+    is copied. Pixels are stored as BGRA, the byte order of the usual 32 bit display format, and blending is
+    disabled, so the frames blit as fast as converted surfaces. Sheets changed after the bundle was built are
+    left out, and their frames are cut from the PNG as before.
+    """
+
+    # Version of the index written by build_bundle.py.
+    VERSION = 1
+
+    def __init__(self, path, index_path):
+        """Constructor of the bundle. The files are only read on the first use.
+
+        Args:
+            path (str): The path of the raw pixel file. None disables the bundle.
+            index_path (str): The path of the JSON index.
+        """
+        self.path = path
+        self.index_path = index_path
+        self.frames = None
+        self.sheets = set()
+        self.data = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Reads the index and maps the pixel file, once. A missing or outdated bundle is ignored."""
+        with self.lock:
+            if self.frames is not None:
+                return
+            self.frames = {}
+            if self.path is None or not os.path.exists(self.path) or not os.path.exists(self.index_path):
+                return
+            try:
+                with open(self.index_path) as f:
+                    index = json.load(f)
+                if index['version'] != self.VERSION or index['format'] != 'BGRA':
+                    print(f"Ignoring the asset bundle {self.path}: built by another version.")
+                    return
+                with open(self.path, 'rb') as f:
+                    # Copy on write, so a frame drawn on by mistake never writes to the file.
+                    self.data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring the asset bundle {self.path}: {e}")
+                return
+
+            for sheet, stat in index['sheets'].items():
+                try:
+                    current = os.stat(sheet)
+                except OSError:
+                    continue
+                if current.st_mtime_ns == stat['mtime_ns'] and current.st_size == stat['size']:
+                    self.sheets.add(sheet)
+            for frame in index['frames']:
+                if frame['sheet'] in self.sheets:
+                    key = (frame['sheet'], frame['x'], frame['y'], frame['width'], frame['height'])
+                    self.frames[key] = frame
+
+    def has_sheet(self, file):
+        """Tells if every frame of a sheet comes from the bundle.
+
+        Args:
+            file (str): The path of the sheet.
+
+        Returns:
+            bool: True if the sheet is in the bundle and did not change since it was built.
+        """
+        self.load()
+        return file in self.sheets
+
+    def frame(self, key):
+        """Returns a frame of the bundle.
+
+        Args:
+            key (tuple): The (sheet, x, y, width, height) key of the frame, like in the frame cache.
+
+        Returns:
+            pygame.Surface: The frame, or None if it is not in the bundle.
+        """
+        self.load()
+        frame = self.frames.get(key)
+        if frame is None:
+            return None
+        width = frame['width']
+        height = frame['height']
+        pixels = self.data[frame['offset']:frame['offset'] + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), 'BGRA')
+        surface.set_alpha(None)
+        if frame['colorkey'] is not None:
+            surface.set_colorkey(frame['colorkey'])
+        return surface
+
+
+class TextCache:
+    """Cache of the fonts and of the text rendered with them, for the screens and buttons.
+
+    pygame renders whole strings, so the unit cached is the rendered string, keyed by the text, color, size and
+    font. Fonts are opened once per (file, size). Both caches evict the entries used least recently.
+    """
+
+    def __init__(self, max_fonts=FONT_CACHE_SIZE, max_texts=TEXT_CACHE_SIZE):
+        """Constructor of the text cache.
+
+        Args:
+            max_fonts (int): The maximum number of fonts kept open.
+            max_texts (int): The maximum number of rendered texts kept.
+        """
+        self.max_fonts = max_fonts
+        self.max_texts = max_texts
+        self.fonts = OrderedDict()
+        self.texts = OrderedDict()
+
+    def font(self, size, file=FONT_FILE):
+        """Returns a font, opening the file only the first time.
+
+        Args:
+            size (int): The size of the font.
+            file (str): The path of the font file.
+
+        Returns:
+            pygame.font.Font: The shared font.
+        """
+        key = (file, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(file, size)
+            if len(self.fonts) > self.max_fonts:
+                self.fonts.popitem(last=False)
+        else:
+            self.fonts.move_to_end(key)
+        return font
+
+    def render(self, text, color, size, file=FONT_FILE):
+        """Returns a text rendered with antialiasing, rendering it only the first time.
+           The surface is shared, so it must not be modified.
+
+        Args:
+            text (str): The text.
+            color (tuple): The (r, g, b) color of the text.
+            size (int): The size of the font.
+            file (str): The path of the font file.
+
+        Returns:
+            pygame.Surface: The rendered text, with a transparent background.
+        """
+        key = (text, tuple(color), size, file)
+        surface = self.texts.get(key)
+        if surface is None:
+            surface = self.texts[key] = self.font(size, file).render(text, True, color)
+            if len(self.texts) > self.max_texts:
+                self.texts.popitem(last=False)
+        else:
+            self.texts.move_to_end(key)
+        return surface
+
+    def clear(self):
+        """Closes every font and drops every rendered text."""
+        self.fonts.clear()
+        self.texts.clear()
+
+
+frame_cache = FrameCache(FRAME_CACHE_SIZE)
+sounds = SoundRegistry(SOUND_CACHE_DIR)
+images = ImageLoader(ASSET_WORKERS)
+bundle = FrameBundle(ASSET_BUNDLE, ASSET_BUNDLE_INDEX)
+texts = TextCache()
@@ -0,0 +1,206 @@
+"""Micro-benchmarks of the game's hot functions, run headless.
+
+Each benchmark times a single function with the given map size, enemy count and sprite count.
+Results can be saved as a baseline and later runs compared against it:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import pygame
+
+from config import *
+from game import Game
+from inputs import ScriptedInput, InputFrame, LEFT, DOWN
+from assets import frame_cache
+
+
+class StaticSprite(pygame.sprite.Sprite):
+    """Sprite without behaviour, used to fill the map for the drawing benchmark."""
+
+    def __init__(self, game, x, y, image):
+        self._layer = ENEMY_LAYER
+        super().__init__(game.all_sprites)
+        self.image = image
+        self.rect = self.image.get_rect(topleft=(x, y))
+
+
+def measure(function, repeat, number):
+    """Times a function.
+
+    Args:
+        function (callable): The function to time, called without arguments.
+        repeat (int): How many samples are taken.
+        number (int): How many calls are made for each sample.
+
+    Returns:
+        dict: The best and median time of a single call, in microseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {'best_us': min(samples), 'median_us': statistics.median(samples)}
+
+
+def new_game(args):
+    """Starts a headless game with the benchmark parameters.
+
+    Args:
+        args (argparse.Namespace): The benchmark parameters.
+
+    Returns:
+        game.Game: The started game.
+    """
+    # The player keeps walking, so Player.update also goes through the collision code.
+    game = Game(headless=True, seed=args.seed, input_source=ScriptedInput([]))
+    # Every level is generated, so create_tilemap does not depend on what earlier runs cached.
+    game.level_cache = None
+    game.map_width = args.map_width
+    game.map_height = args.map_height
+    game.enemy_qtd = args.enemies
+    game.enemy_engine = args.enemy_engine
+    game.enemy_movement = args.enemy_movement
+    game.new()
+    game.input_frame = InputFrame(LEFT | DOWN)
+    return game
+
+
+def run(args):
+    """Runs every benchmark.
+
+    Args:
+        args (argparse.Namespace): The benchmark parameters.
+
+    Returns:
+        dict: The results of each benchmark, by name.
+    """
+    game = new_game(args)
+    results = {}
+
+    results['generate_map'] = measure(game.generate_map, args.repeat, 1)
+
+    def create_tilemap():
+        game.clear_level()
+        game.create_tilemap()
+    results['create_tilemap'] = measure(create_tilemap, args.repeat, 1)
+
+    sheet = game.enemy_spritesheet
+    results['get_sprite'] = measure(lambda: sheet.get_sprite(96, 0, TILESIZE, TILESIZE), args.repeat, args.number)
+
+    def get_sprite_uncached():
+        # Always slices the PNG sheet, even when the frame is in the asset bundle.
+        frame_cache.clear()
+        frame_cache.get((sheet.file, 96, 0, TILESIZE, TILESIZE), lambda: sheet.cut_sprite(96, 0, TILESIZE, TILESIZE))
+    results['get_sprite_uncached'] = measure(get_sprite_uncached, args.repeat, args.number)
+
+    # Runs on a fresh level, so the enemies and the player are where the map placed them.
+    game.clear_level()
+    game.create_tilemap()
+    game.input_frame = InputFrame(LEFT | DOWN)
+    results['player_update'] = measure(game.player.update, args.repeat, args.number)
+
+    def enemies_update():
+        if game.enemy_engine == 'arrays':
+            game.enemies.update()
+        else:
+            for enemy in game.enemies:
+                enemy.update()
+    results['enemy_update'] = measure(enemies_update, args.repeat, args.number)
+
+    image = sheet.get_sprite(0, 0, TILESIZE, TILESIZE)
+    for _ in range(args.sprites):
+        StaticSprite(game, game.rng.randrange(game.map_width * TILESIZE),
+                     game.rng.randrange(game.map_height * TILESIZE), image)
+    results['custom_draw'] = measure(lambda: game.camera_group.custom_draw(game.player), args.repeat, args.number)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints the change of each benchmark against a baseline.
+
+    Args:
+        results (dict): The results of this run.
+        baseline (dict): The saved baseline, as written by --save.
+        tolerance (float): Allowed slowdown, like 0.1 for 10%.
+
+    Returns:
+        list: The names of the benchmarks slower than the tolerance.
+    """
+    if baseline['params'] != results['params']:
+        print(f"Warning: the baseline was recorded with other parameters: {baseline['params']}")
+
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            print(f'{name:22} new benchmark')
+            continue
+        # The best time is the least affected by other processes, so it is the one compared.
+        ratio = result['best_us'] / old['best_us']
+        status = ''
+        if ratio > 1 + tolerance:
+            status = 'REGRESSION'
+            regressions.append(name)
+        print(f"{name:22} {old['best_us']:12.2f} -> {result['best_us']:12.2f} us  {ratio:6.2f}x {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--map-width', type=int, default=MAP_WIDTH)
+    parser.add_argument('--map-height', type=int, default=MAP_HEIGHT)
+    parser.add_argument('--enemies', type=int, default=DIFFICULTY_ENEMIES[-1], help='Enemies spawned on the level.')
+    parser.add_argument('--enemy-engine', choices=['sprites', 'arrays'], default=ENEMY_ENGINE,
+                        help='How the enemies are simulated, see ENEMY_ENGINE.')
+    parser.add_argument('--enemy-movement', choices=['wander', 'chase'], default=ENEMY_MOVEMENT,
+                        help='How the enemies move, see ENEMY_MOVEMENT.')
+    parser.add_argument('--sprites', type=int, default=1000, help='Extra static sprites spread on the map for custom_draw.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=7, help='Samples taken for each benchmark.')
+    parser.add_argument('--number', type=int, default=100, help='Calls made for each sample of the fast benchmarks.')
+    parser.add_argument('--save', metavar='PATH', help='Saves the results as a baseline.')
+    parser.add_argument('--compare', metavar='PATH', help='Compares the results with a saved baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed slowdown when comparing, 0.1 is 10%%.')
+    args = parser.parse_args()
+
+    results = {
+        'params': {
+            'map_width': args.map_width,
+            'map_height': args.map_height,
+            'enemies': args.enemies,
+            'enemy_engine': args.enemy_engine,
+            'enemy_movement': args.enemy_movement,
+            'sprites': args.sprites,
+            'seed': args.seed,
+        },
+        'benchmarks': run(args),
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+    else:
+        regressions = []
+        for name, result in results['benchmarks'].items():
+            print(f"{name:22} best {result['best_us']:12.2f} us  median {result['median_us']:12.2f} us")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
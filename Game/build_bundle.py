@@ -0,0 +1,80 @@
+"""Packs every sprite frame into a raw pixel bundle, so the game starts without decoding and slicing the PNG sheets.
+
+Each sheet is cut into square frames as tall as the sheet, from left to right, exactly like SpriteSheet.cut_sprite
+does at runtime. The pixels go one after another into ASSET_BUNDLE, and ASSET_BUNDLE_INDEX records the name, sheet,
+rect, colorkey and byte offset of each frame. Run it again after changing the sheets:
+
+    python build_bundle.py
+"""
+import argparse
+import glob
+import json
+import os
+
+import pygame
+
+from config import *
+from assets import FrameBundle, atomic_write
+from sprites import SpriteSheet
+
+# Sheets packed into the bundle. The backgrounds are not frames, so they are loaded as images.
+SHEETS = sorted(glob.glob('img/chars/*.png') + glob.glob('img/tiles/*.png'))
+
+
+def build(sheets, path, index_path):
+    """Writes the bundle and its index.
+
+    Args:
+        sheets (list): The paths of the spritesheets.
+        path (str): The path of the raw pixel file.
+        index_path (str): The path of the JSON index.
+
+    Returns:
+        dict: The index written.
+    """
+    index = {'version': FrameBundle.VERSION, 'format': 'BGRA', 'sheets': {}, 'frames': []}
+    pixels = bytearray()
+    for file in sheets:
+        stat = os.stat(file)
+        index['sheets'][file] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        spritesheet = SpriteSheet(file)
+        width, height = spritesheet.sheet.get_size()
+        for number, x in enumerate(range(0, width - height + 1, height)):
+            frame = spritesheet.cut_sprite(x, 0, height, height)
+            colorkey = frame.get_colorkey()
+            index['frames'].append({
+                'name': f'{file}#{number}',
+                'sheet': file,
+                'x': x,
+                'y': 0,
+                'width': height,
+                'height': height,
+                'colorkey': list(colorkey[:3]) if colorkey else None,
+                'offset': len(pixels),
+            })
+            pixels += pygame.image.tobytes(frame, 'BGRA')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    atomic_write(path, bytes(pixels))
+    # The index goes last, so it never describes a bundle that was not written.
+    atomic_write(index_path, json.dumps(index, indent=1).encode())
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=ASSET_BUNDLE, help='Path of the raw pixel file.')
+    parser.add_argument('--index', default=ASSET_BUNDLE_INDEX, help='Path of the JSON index.')
+    args = parser.parse_args()
+
+    # The frames are cut from sheets converted to the display format, like in the game.
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    index = build(SHEETS, args.output, args.index)
+    print(f"Packed {len(index['frames'])} frames of {len(index['sheets'])} sheets into {args.output} "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB).")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,14 +14,83 @@ TILESIZE = 96  # 32
 PLAYERSIZE = 64
 MAP_WIDTH = 30
 MAP_HEIGHT = 30
+# Tile codes of the generated maps, one byte per tile: the ASCII code of each letter.
+WALL_TILE = ord('B')
+FLOOR_TILE = ord('.')
+PLAYER_TILE = ord('P')
+ENEMY_TILE = ord('E')
+STAIR_TILE = ord('S')
+# Static tiles are baked into square chunks of CHUNK_SIZE x CHUNK_SIZE tiles.
+CHUNK_SIZE = 8
+# Only the chunks on screen get a sprite. The chunks up to CHUNK_PREFETCH chunks further are baked ahead by
+# CHUNK_WORKERS threads, and the CHUNK_CACHE_SIZE chunks used last are kept, so memory does not grow with the map.
+CHUNK_PREFETCH = 1
+CHUNK_WORKERS = 2
+CHUNK_CACHE_SIZE = 48
+# Cell size of the spatial indexes used to find the sprites on screen and nearby entities.
+SPATIAL_CELL_SIZE = TILESIZE * 2
 
 FPS = 60
+# The game is updated TICK_RATE times per second, no matter the frame rate. Slow frames run
+# up to MAX_UPDATES_PER_FRAME updates to catch up, and drop the remaining time after that.
+TICK_RATE = 60
+MAX_UPDATES_PER_FRAME = 5
+# How the frame rate is limited to FPS:
+# - 'sleep' sleeps between frames, using little CPU but with more jitter.
+# - 'busy' waits in a busy loop, more precise but using a whole CPU core.
+# - 'none' draws as fast as possible.
+FRAME_PACING = 'sleep'
+# How each frame is drawn:
+# - 'full' clears the screen and draws every visible sprite.
+# - 'dirty' only draws again the areas that changed, as long as the camera does not move.
+RENDER_MODE = 'full'
+
+# Frames the profiler percentiles are computed over, and frames between each refresh of its overlay (F3).
+PROFILER_WINDOW = 300
+PROFILER_OVERLAY_INTERVAL = 15
+# File where the profiler logs every frame, .csv or .jsonl. None disables the log.
+PROFILER_LOG = None
+
+# Images decoded at the same time by the asset loader. None uses one thread per CPU core, up to 4.
+ASSET_WORKERS = None
+INTRO_BACKGROUND = 'img/introbackground.png'
+GAME_OVER_BACKGROUND = 'img/gameover.png'
+
+# Sprite frames pre-sliced by build_bundle.py. None always cuts the frames from the PNG sheets.
+ASSET_BUNDLE = 'build/frames.bin'
+ASSET_BUNDLE_INDEX = 'build/frames.json'
+
+# Maximum number of sprite frames kept in the shared frame cache. None keeps all of them.
+FRAME_CACHE_SIZE = None
+
+# Font of the screens and buttons. The FONT_CACHE_SIZE fonts and TEXT_CACHE_SIZE rendered texts used last are kept.
+FONT_FILE = 'fonts/times_new_roman.ttf'
+FONT_CACHE_SIZE = 8
+TEXT_CACHE_SIZE = 64
+
+BACKGROUND_MUSIC = './sounds/background.wav'
+SWORD_SOUND = './sounds/sword.mp3'
+ENEMY_DEAD_SOUND = './sounds/vampire_dead.mp3'
+# Directory where decoded sounds are kept for faster starts. None disables it.
+SOUND_CACHE_DIR = '.cache/sounds'
+# Directory where the maps of seeded games are kept, so they load without being generated again. None disables it.
+LEVEL_CACHE_DIR = '.cache/levels'
 # Layers determines who spawns first. First the blocks (floor and walls), then the player, in the top of the floor.
 GROUND_LAYER = 1
 BLOCK_LAYER = 2
 ENEMY_LAYER = 3
 PLAYER_LAYER = 4
 
+# How the enemies are simulated:
+# - 'sprites' makes each enemy a sprite with its own update.
+# - 'arrays' keeps every enemy in NumPy arrays updated together, for levels with thousands of enemies.
+ENEMY_ENGINE = 'sprites'
+# How the enemies move:
+# - 'wander' walks up and down, turning to a random side after a while.
+# - 'chase' follows the shortest path to the player, when it is at most CHASE_DISTANCE tiles away, and wanders otherwise.
+ENEMY_MOVEMENT = 'wander'
+CHASE_DISTANCE = 20
+
 PLAYER_SPEED = 3
 ENEMY_SPEED = 3
 
@@ -31,6 +100,8 @@ WHITE = (255, 255, 255)
 BLUE = (0, 0, 255)
 
 DIFFICULTIES = ['Easy', 'Hard', 'Impossible']
+# Enemies spawned on each level, for each difficulty.
+DIFFICULTY_ENEMIES = [5, 10, 20]
 
 # Each tile 32px, and height is 480px, and width is 640px so we have:
 # - 480/32 = 15 rows
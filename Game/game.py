@@ -1,29 +1,75 @@
 import pygame
 from sprites import *
 from config import *
-from random import randint
+from assets import sounds, images, texts
+from spatial import SpatialGroup
+from inputs import KeyboardInput, InputFrame, ATTACK, INTERACT, QUIT, OVERLAY
+from level import Level, ChunkStreamer, FLOOR_SPRITESHEETS
+from levelcache import LevelCache
+from swarm import EnemySwarm
+from profiler import FrameProfiler
+from animation import Animator, load_clips
+from pathfinding import FlowField
 from pygame import mixer
-import yaml
-from yaml.loader import SafeLoader
+import mapgen
+import numpy as np
+import hashlib
+import os
+import random
+import statistics
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Game:
     """Game main class."""
 
-    def __init__(self):
-        """The game constructor. Initializes the screen, fonts, images for the sprites and the game clock."""
+    def __init__(self, headless=False, seed=None, input_source=None):
+        """The game constructor. Initializes the screen, fonts, images for the sprites and the game clock.
+
+        Args:
+            headless (bool): Runs without a window or sound device, and without limiting the frame rate.
+            seed (int): Seed for every random choice of the game. None uses a random seed.
+            input_source (object): Where the input of each frame comes from, like inputs.ScriptedInput. Defaults to the keyboard.
+        """
+        self.headless = headless
+        if headless:
+            # SDL reads the drivers when it is initialized.
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
         pygame.init()
 
-        # Open the file and load the file
-        with open('config.yaml') as f:
-            self.cfg = yaml.load(f, Loader=SafeLoader)
-            print(self.cfg)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.input = input_source if input_source is not None else KeyboardInput()
+        self.input_frame = InputFrame()
+        self.set_difficulty(0)
+        self.map_width = MAP_WIDTH
+        self.map_height = MAP_HEIGHT
+        self.enemy_engine = ENEMY_ENGINE
+        self.enemy_movement = ENEMY_MOVEMENT
+        self.render_mode = RENDER_MODE
+
+        # config.yaml is parsed once, by config.py.
+        self.cfg = cfg
+        print(self.cfg)
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font('fonts/times_new_roman.ttf', 32)
+        # Durations of the last frames, in seconds, used to measure the frame pacing.
+        self.frame_times = deque(maxlen=FPS * 2)
+        self.frame_count = 0
+        self.profiler = FrameProfiler()
+        # Animation clips, built on the first game, when the spritesheets are needed.
+        self.clips = None
+        # Killed attacks and enemies are kept to be reused, instead of creating new sprites for each attack and level.
+        self.attack_pool = SpritePool(self, Attack)
+        self.enemy_pool = SpritePool(self, Enemy)
         self.running = True
 
+        # Images are decoded on the asset loader threads, in the order they are needed: the intro first,
+        # then what the first level needs, and what only matters later at the end.
+        images.request(INTRO_BACKGROUND)
         self.character_spritesheet = SpriteSheet('img/chars/player-sheet.png')
         self.stair_spritesheet = SpriteSheet('img/tiles/stairs.png')
         self.wall_spritesheet = SpriteSheet('img/tiles/stone_wall.png')
@@ -31,16 +77,21 @@ class Game:
             'img/tiles/stone_wall_detail1.png')
         self.wall_spritesheet_detail2 = SpriteSheet(
             'img/tiles/stone_wall_detail2.png')
+        images.preload(FLOOR_SPRITESHEETS[0][1:])
+        # Decodes every sound once, so spawning enemies and attacking never waits for a decode.
+        images.submit(sounds.preload, [BACKGROUND_MUSIC, SWORD_SOUND, ENEMY_DEAD_SOUND])
         self.enemy_spritesheet = SpriteSheet('img/chars/enemy.png')
         self.attack_spritesheet = SpriteSheet('img/chars/attack-sheet.png')
-        self.intro_background = pygame.image.load('img/introbackground.png')
-        self.game_over_background = pygame.image.load('img/gameover.png')
-
-        # Floors
-        self.floor_spritesheet = SpriteSheet('img/tiles/grass.png')
-        self.floor_detail_spritesheet = SpriteSheet(
-            'img/tiles/grass_flower.png')
+        images.request(GAME_OVER_BACKGROUND)
 
+        # Builds the next level while the current one is played.
+        self.level_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-builder')
+        self.next_level = None
+        # Bakes the chunks of the current level ahead of the player.
+        self.chunk_builder = ThreadPoolExecutor(max_workers=CHUNK_WORKERS, thread_name_prefix='chunk-builder')
+        self.chunk_streamer = None
+        # Seeded games always get the same maps, so they are kept on disk to skip generating them again.
+        self.level_cache = LevelCache(LEVEL_CACHE_DIR) if seed is not None and LEVEL_CACHE_DIR else None
 
         # if self.cfg['difficulty'] == 'easy':
         #     self.enemy_qtd = 5
@@ -52,115 +103,66 @@ class Game:
         #     raise ValueError(
         #         "Difficulty provided does not exist. Try using 'easy', 'hard' or 'impossible'. ")
 
-    def generate_map(self):
+    def generate_map(self, seed=None, enemy_qtd=None):
         """Generates the map for the level. 
            Uses procedural generation using a 'drunk' agent, that walks around in a random way removing the walls.
-           We have:
+           The walk and the spawns are vectorized in mapgen, so even huge maps generate quickly.
+           Each tile is the ASCII code of its letter:
            - B for walls
            - . for free spaces
            - P for player
            - E for Enemies
            - S for stairs
 
+        Args:
+            seed (int): Seed of the map. Defaults to one taken from the game random generator.
+            enemy_qtd (int): How many enemies are spawned. Defaults to the amount of the difficulty.
+
         Returns:
-            list: A matrix representing the tilemap for the level.
+            numpy.ndarray: A matrix representing the tilemap for the level.
         """
-
-        tilemap = [['B' for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
-        percentage_of_floor = 0.6
-        wall_count_down = int(MAP_WIDTH * MAP_HEIGHT * percentage_of_floor)
-
-        drunk_agent = {
-            'wallCountdown': wall_count_down,
-            'padding': 1,
-            'x': MAP_WIDTH // 2,
-            'y': MAP_HEIGHT // 2
-        }
-
-        free_tiles = []
-
-        while drunk_agent['wallCountdown'] >= 0:
-            x = drunk_agent['x']
-            y = drunk_agent['y']
-
-            if tilemap[y][x] == 'B':
-                tilemap[y][x] = '.'
-                drunk_agent['wallCountdown'] -= 1
-                free_tiles.append((y, x))
-
-            roll = randint(1, 4)
-
-            if roll == 1 and x > drunk_agent['padding']:
-                drunk_agent['x'] -= 1
-
-            if roll == 2 and x < MAP_WIDTH - 1 - drunk_agent['padding']:
-                drunk_agent['x'] += 1
-
-            if roll == 3 and y > drunk_agent['padding']:
-                drunk_agent['y'] -= 1
-
-            if roll == 4 and y < MAP_HEIGHT - 1 - drunk_agent['padding']:
-                drunk_agent['y'] += 1
-
-        player_y = MAP_WIDTH // 2
-        player_x = MAP_HEIGHT // 2
-        tilemap[player_y][player_x] = 'P'
-
-        # Spawn enemies from a certain distance from the player.
-        enemy_count = self.enemy_qtd
-        enemy_distance = 0.3
-        while (enemy_count > 0):
-            index = randint(0, len(free_tiles) - 1)
-            y = free_tiles[index][0]
-            x = free_tiles[index][1]
-
-            y_distance = abs(y - player_y)
-            x_distance = abs(x - player_x)
-
-            if (y_distance >= MAP_WIDTH * enemy_distance) and (x_distance >= MAP_HEIGHT * enemy_distance):
-                tilemap[y][x] = 'E'
-                enemy_count -= 1
-
-        # Spawn stairs
-        # Tries 30 times to spawn a random stair that is some percentage away from the player.
-        tentatives = 30
-        stair_distance = 0.7
-        greater_x_and_y = [0, 0]
-        while tentatives >= 0:
-            tentatives = tentatives - 1
-            index = randint(0, len(free_tiles) - 1)
-            y = free_tiles[index][0]
-            x = free_tiles[index][1]
-            y_distance = abs(y - player_y)
-            x_distance = abs(x - player_x)
-            if (y_distance >= MAP_WIDTH * stair_distance) and (x_distance >= MAP_HEIGHT * stair_distance):
-                tilemap[y][x] = 'S'
-                break
-            # Saves the best X and Y values so far.
-            if y_distance > greater_x_and_y[1] and x_distance > greater_x_and_y[0]:
-                greater_x_and_y[1] = y
-                greater_x_and_y[0] = x
-            # Uses the best X and Y values to create the stairs if not created before.
-            if tentatives == 0:
-                tilemap[greater_x_and_y[1]][greater_x_and_y[0]] = 'S'
-                break
-
-        return tilemap
+        if seed is None:
+            seed = self.rng.getrandbits(64)
+        if enemy_qtd is None:
+            enemy_qtd = self.enemy_qtd
+        return mapgen.generate_map(self.map_width, self.map_height, enemy_qtd, np.random.default_rng(seed))
 
     def create_tilemap(self):
-        """Create the tilemap, calling the map generation method and rendering the result."""
-        tilemap = self.generate_map()
-        for i, row in enumerate(tilemap):
-            for j, column in enumerate(row):
-                Ground(self, j, i)
-                if column == "B":
-                    Block(self, j, i)
-                if column == "P":
-                    self.player = Player(self, j, i)
-                if column == "E":
-                    Enemy(self, j, i)
-                if column == "S":
-                    Stair(self, j, i)
+        """Create the tilemap of the current level, calling the map generation method and rendering the result."""
+        self.install_level(Level(self, self.current_level, self.rng.getrandbits(64), self.enemy_qtd))
+
+    def install_level(self, level):
+        """Makes a built level the current one, spawning its sprites.
+           The floor, walls and stairs never change, so they are drawn from baked chunks instead of one sprite
+           per tile, and only the chunks around the player are kept, so the map can be much larger than the screen.
+
+        Args:
+            level (level.Level): The level to play.
+        """
+        self.tile_grid = level.tile_grid
+        # Chasing enemies all follow a single flow field from the player.
+        self.flow_field = FlowField(self.tile_grid) if self.enemy_movement == 'chase' else None
+
+        for x, y in level.spawns(PLAYER_TILE):
+            self.player = Player(self, x, y)
+        if self.chunk_streamer is not None:
+            self.chunk_streamer.close()
+        self.chunk_streamer = ChunkStreamer(self, level, self.chunk_builder)
+        self.chunk_streamer.update(self.player.rect)
+        if self.enemy_engine == 'arrays':
+            self.enemies.spawn(level.spawns(ENEMY_TILE))
+        else:
+            for x, y in level.spawns(ENEMY_TILE):
+                self.enemy_pool.get(x, y)
+        for x, y in level.spawns(STAIR_TILE):
+            Stair(self, x, y)
+
+    def prepare_next_level(self):
+        """Starts building the next level in the background, while the current one is played."""
+        index = self.current_level + 1
+        # The seed is taken here, on the main thread, so seeded games get the same levels however long the build takes.
+        self.next_level = self.level_builder.submit(
+            Level, self, index, self.rng.getrandbits(64), self.enemy_qtd)
 
     def new(self):
         """Method responsible for starting a new game, initializing the sprites and camera."""
@@ -173,53 +175,70 @@ class Game:
         self.cooldown_step = 0.2
 
         self.camera_group = CameraGroup(self)
-
-        self.all_sprites = pygame.sprite.LayeredUpdates()
-        self.blocks = pygame.sprite.LayeredUpdates()
-        self.interactables = pygame.sprite.LayeredUpdates()
-        self.enemies = pygame.sprite.LayeredUpdates()
+        if self.clips is None:
+            self.clips = load_clips(self)
+        self.animator = Animator()
+
+        self.all_sprites = SpatialGroup(SPATIAL_CELL_SIZE)
+        self.interactables = SpatialGroup(SPATIAL_CELL_SIZE)
+        if self.enemy_engine == 'arrays':
+            self.enemies = EnemySwarm(self)
+        else:
+            self.enemies = SpatialGroup(SPATIAL_CELL_SIZE)
         self.attacks = pygame.sprite.LayeredUpdates()
         self.create_tilemap()
+        self.prepare_next_level()
 
         # Starts background song
         mixer.init()
-        mixer.music.load('./sounds/background.wav')
-        mixer.music.set_volume(0.2)
-        mixer.music.play(-1)
+        # The song plays on a reserved channel, so sound effects never take its channel when they use all the others.
+        mixer.set_reserved(1)
+        self.background_music = sounds.get(BACKGROUND_MUSIC)
+        self.background_music.set_volume(0.2)
+        # Playing on the same channel replaces the song, so restarting the game does not stack a second copy.
+        mixer.Channel(0).play(self.background_music, loops=-1)
+
+    def set_difficulty(self, difficulty):
+        """Sets the difficulty and the amount of enemies of each level.
+
+        Args:
+            difficulty (int): The index of the difficulty in DIFFICULTIES.
+        """
+        self.difficulty = difficulty
+        self.enemy_qtd = DIFFICULTY_ENEMIES[difficulty]
 
     def events(self):
-        """Method that loops on the events of the game, for each frame.."""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.playing = False
-                self.running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if self.player.facing == 'up' and self.attack_cooldown <= 0:
-                        Attack(self, self.player.rect.x,
-                               self.player.rect.y - TILESIZE)
-                        self.attack_cooldown = 10
-                    if self.player.facing == 'down' and self.attack_cooldown <= 0:
-                        Attack(self, self.player.rect.x,
-                               self.player.rect.y + TILESIZE)
-                        self.attack_cooldown = 10
-                    if self.player.facing == 'left' and self.attack_cooldown <= 0:
-                        Attack(self, self.player.rect.x -
-                               TILESIZE, self.player.rect.y)
-                        self.attack_cooldown = 10
-                    if self.player.facing == 'right' and self.attack_cooldown <= 0:
-                        Attack(self, self.player.rect.x +
-                               TILESIZE, self.player.rect.y)
-                        self.attack_cooldown = 10
-                if event.key == pygame.K_e and self.is_in_range_of_interactable:
-                    # Clicks E to interact with the environment, and is in range.
-                    # TODO test interactable type
-                    if isinstance(self.interactable_in_range, Stair):
-                        if self.all_enemies_killed():
-                            print("All enemies killed")
-                            self.descend()
-                        else:
-                            print("There are still enemies remaining.")
+        """Method that reads the input of the game, for each frame.."""
+        self.input_frame = self.input.poll()
+        if self.input_frame.was_pressed(QUIT):
+            self.playing = False
+            self.running = False
+        if self.input_frame.was_pressed(OVERLAY):
+            self.profiler.overlay = not self.profiler.overlay
+            # The dirty render mode would leave the old overlay on the screen.
+            self.camera_group.previous_offset = None
+        if self.input_frame.was_pressed(ATTACK):
+            if self.player.facing == 'up' and self.attack_cooldown <= 0:
+                self.attack_pool.get(self.player.rect.x, self.player.rect.y - TILESIZE)
+                self.attack_cooldown = 10
+            if self.player.facing == 'down' and self.attack_cooldown <= 0:
+                self.attack_pool.get(self.player.rect.x, self.player.rect.y + TILESIZE)
+                self.attack_cooldown = 10
+            if self.player.facing == 'left' and self.attack_cooldown <= 0:
+                self.attack_pool.get(self.player.rect.x - TILESIZE, self.player.rect.y)
+                self.attack_cooldown = 10
+            if self.player.facing == 'right' and self.attack_cooldown <= 0:
+                self.attack_pool.get(self.player.rect.x + TILESIZE, self.player.rect.y)
+                self.attack_cooldown = 10
+        if self.input_frame.was_pressed(INTERACT) and self.is_in_range_of_interactable:
+            # Clicks E to interact with the environment, and is in range.
+            # TODO test interactable type
+            if isinstance(self.interactable_in_range, Stair):
+                if self.all_enemies_killed():
+                    print("All enemies killed")
+                    self.descend()
+                else:
+                    print("There are still enemies remaining.")
 
     def all_enemies_killed(self):
         """Tests if there are enemies alive in the current level."""
@@ -228,49 +247,169 @@ class Game:
     def descend(self):
         self.current_level += 1
         print("Descending to level ", self.current_level)
-        for sprite in self.all_sprites:
-            sprite.kill()
-        if self.current_level > 2:
-            self.floor_spritesheet = SpriteSheet('img/tiles/dirt.png')
-            self.floor_detail_spritesheet = SpriteSheet('img/tiles/mud.png')
-        if self.current_level > 5:
-            self.floor_spritesheet = SpriteSheet(
-                'img/tiles/stone_brick_floor.png')
-            self.floor_detail_spritesheet = SpriteSheet(
-                'img/tiles/stone_brick_floor_detail.png')
-        self.create_tilemap()
+        # The level was built in the background while the previous one was played, so this is usually just a swap.
+        level = self.next_level.result()
+        self.clear_level()
+        self.install_level(level)
+        self.prepare_next_level()
+
+    def clear_level(self):
+        """Removes every sprite of the current level."""
+        for group in (self.all_sprites, self.interactables):
+            for sprite in group:
+                sprite.kill()
+        self.enemies.empty()
 
     def update(self):
         """Method that updates all the sprites in the game, for each frame."""
-        # This goes to all the sprites contained in the group and call their update method.
-        self.all_sprites.update()
+        with self.profiler.phase('update'):
+            if self.flow_field is not None:
+                with self.profiler.phase('update.flow_field'):
+                    player = self.player.rect
+                    self.flow_field.update((player.centerx // TILESIZE, player.centery // TILESIZE))
+            # This goes to all the sprites contained in the group and call their update method.
+            self.profiler.update_by_type(self.all_sprites)
+            if self.enemy_engine == 'arrays':
+                with self.profiler.phase('update.EnemySwarm'):
+                    self.enemies.update()
+            with self.profiler.phase('update.animations'):
+                self.animator.advance()
+            with self.profiler.phase('update.chunks'):
+                self.chunk_streamer.update(self.player.rect)
         self.attack_cooldown -= self.cooldown_step
 
-    def draw(self):
-        """Method that draws everything on the screen for each frame."""
+    def draw(self, alpha=1.0):
+        """Method that draws everything on the screen for each frame.
+
+        Args:
+            alpha (float): How far the frame is between the previous and the current update, from 0 to 1.
+        """
         self.camera_group.update()
-        self.camera_group.custom_draw(self.player)
-        self.clock.tick(FPS)
-        pygame.display.update()
+        with self.profiler.phase('draw'):
+            dirty = self.camera_group.custom_draw(self.player, alpha)
+        overlay = self.profiler.draw(self.screen)
+        if overlay is not None:
+            dirty.append(overlay)
+        with self.profiler.phase('display'):
+            pygame.display.update(dirty)
+
+    def end_frame(self):
+        """Records the sprite counts of the frame and closes it in the profiler."""
+        self.profiler.count('all_sprites', len(self.all_sprites))
+        self.profiler.count('enemies', len(self.enemies))
+        self.profiler.count('interactables', len(self.interactables))
+        self.profiler.count('attacks', len(self.attacks))
+        self.profiler.count('drawn', self.camera_group.drawn_count)
+        self.profiler.count('culled', self.camera_group.culled_count)
+        self.profiler.end_frame()
+
+    def state_digest(self):
+        """Returns a digest of the state of the game, to check that a replay played exactly like the recording.
+
+        Returns:
+            bytes: The SHA-1 digest of the level, the player, the enemies and the random generators.
+        """
+        if self.enemy_engine == 'arrays':
+            # The swarm moves its enemies with its own generator.
+            enemies = (self.enemies.x.tolist(), self.enemies.y.tolist(), self.enemies.dying.tolist(),
+                       self.enemies.rng.bit_generator.state)
+        else:
+            enemies = [(tuple(enemy.rect), enemy.died) for enemy in self.enemies]
+        state = (self.current_level, tuple(self.player.rect), enemies, self.rng.getstate())
+        return hashlib.sha1(repr(state).encode()).digest()
+
+    def pace(self):
+        """Waits until it is time for the next frame, following FRAME_PACING."""
+        if self.headless or FRAME_PACING == 'none':
+            # Headless runs go as fast as the CPU allows.
+            self.clock.tick()
+        elif FRAME_PACING == 'busy':
+            self.clock.tick_busy_loop(FPS)
+        else:
+            self.clock.tick(FPS)
+
+    def frame_jitter(self):
+        """Returns the standard deviation of the recent frame times, in milliseconds."""
+        if len(self.frame_times) < 2:
+            return 0.0
+        return statistics.pstdev(self.frame_times) * 1000
 
     def main(self):
         """The main loop of the game. Calls all the other methods.
             It:
             1 - Checks for events and take action
-            2 - Updates everything
-            3 - Draws the results of the frame
+            2 - Updates everything, TICK_RATE times per second
+            3 - Draws the results of the frame, between the last two updates
         """
+        tick = 1 / TICK_RATE
+        accumulator = 0.0
+        previous = time.perf_counter()
         while self.playing:
-            self.events()
+            frame_start = time.perf_counter_ns()
+            now = time.perf_counter()
+            frame_time = now - previous
+            previous = now
+            self.frame_times.append(frame_time)
+            accumulator += frame_time
+
+            updates = 0
+            while accumulator >= tick and self.playing:
+                with self.profiler.phase('events'):
+                    self.events()
+                if not self.playing:
+                    break
+                self.update()
+                accumulator -= tick
+                updates += 1
+                if updates == MAX_UPDATES_PER_FRAME:
+                    # Too far behind, drops the remaining time instead of slowing down every next frame.
+                    accumulator %= tick
+                    break
+
+            self.draw(accumulator / tick)
+            with self.profiler.phase('pace'):
+                self.pace()
+            # Taken at the end, so the frame time is of the same frame as its phase times. It is not called 'frame',
+            # which is the frame number in the log records.
+            self.profiler.add('frame_time', time.perf_counter_ns() - frame_start)
+            self.end_frame()
+
+            self.frame_count += 1
+            if self.frame_count % FPS == 0:
+                pygame.display.set_caption(
+                    f'{len(self.frame_times) / sum(self.frame_times):.0f} FPS, jitter {self.frame_jitter():.2f} ms')
+
+    def simulate(self, frames, render=False):
+        """Runs the game loop for a number of frames as fast as possible, for regression and load tests.
+           The game must be started with new() first.
+
+        Args:
+            frames (int): The maximum number of frames to run.
+            render (bool): Also draws each frame. Only updates the game when False.
+
+        Returns:
+            int: The number of frames run, less than frames if the game ended before.
+        """
+        for frame in range(frames):
+            if not self.playing:
+                return frame
+            with self.profiler.phase('events'):
+                self.events()
+            if not self.playing:
+                # Quitting ends the game before the update, so a replay stops on the same update as its recording.
+                return frame
             self.update()
-            self.draw()
+            if render:
+                self.draw()
+            self.end_frame()
+        return frames
 
     def game_over(self):
         """Displays the Game Over screen."""
-        text = self.font.render('Game Over', True, RED)
+        text = texts.render('Game Over', RED, 32)
         text_rect = text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2))
 
-        # score = self.font.render(f'Score: {self.current_level}', True, RED)
+        # score = texts.render(f'Score: {self.current_level}', RED, 32)
         # score_rect = score.get_rect(
         #     center=(SCREEN_WIDTH/2, SCREEN_HEIGHT * 0.8))
 
@@ -279,6 +418,7 @@ class Game:
 
         for sprite in self.all_sprites:
             sprite.kill()
+        self.enemies.empty()
 
         while self.running:
             for event in pygame.event.get():
@@ -291,7 +431,7 @@ class Game:
                 self.new()
                 self.main()
 
-            self.screen.blit(self.game_over_background, (0, 0))
+            self.screen.blit(images.get(GAME_OVER_BACKGROUND), (0, 0))
             self.screen.blit(text, text_rect)
             # self.screen.blit(score, score_rect)
             self.screen.blit(restart_button.image, restart_button.rect)
@@ -308,21 +448,17 @@ class Game:
         difficulty_button_height = 50
         difficulty_button_font_size = 32
 
-        self.difficulty = 0
-        self.enemy_qtd = 5
-
-        title = self.font.render('Tiny Adventure', True, BLACK)
-        dif_text = self.font.render('Difficulty: ', True, BLACK)
-        credits = self.font.render(
-            'sounds by', True, BLACK)
-        credits_1 = self.font.render(
-            'SoundFlakes (Giant Demon - Roar - 02.wav);', True, BLACK)
-        credits_2 = self.font.render(
-            'BloodPixelHero (Adventure theme);', True, BLACK)
-        credits_3 = self.font.render(
-            'Merrick079 (Sword sound 2.wav)', True, BLACK)
-        credits_4 = self.font.render(
-            'at freesound.org', True, BLACK)
+        self.set_difficulty(0)
+
+        # Only waits for the intro background, the rest keeps loading while the intro is shown.
+        intro_background = images.get(INTRO_BACKGROUND)
+        title = texts.render('Tiny Adventure', BLACK, 32)
+        dif_text = texts.render('Difficulty: ', BLACK, 32)
+        credits = texts.render('sounds by', BLACK, 32)
+        credits_1 = texts.render('SoundFlakes (Giant Demon - Roar - 02.wav);', BLACK, 32)
+        credits_2 = texts.render('BloodPixelHero (Adventure theme);', BLACK, 32)
+        credits_3 = texts.render('Merrick079 (Sword sound 2.wav)', BLACK, 32)
+        credits_4 = texts.render('at freesound.org', BLACK, 32)
 
         title_rect = title.get_rect(x=10, y=10)
         dif_rect = dif_text.get_rect(x=10, y=150)
@@ -356,18 +492,9 @@ class Game:
                 intro = False
             
             if difficulty_button.is_pressed(mouse_pos, mouse_pressed):
-                self.difficulty += 1
-                if self.difficulty >= len(DIFFICULTIES):
-                    self.difficulty = 0
-
                 # Set enemy quantity based on difficulty.
-                if self.difficulty == 0:
-                    self.enemy_qtd = 5
-                elif self.difficulty == 1:
-                    self.enemy_qtd = 10
-                else:
-                    self.enemy_qtd = 20
-                
+                self.set_difficulty((self.difficulty + 1) % len(DIFFICULTIES))
+
                 # Update button text.
                 difficulty_button = Button(
                     difficulty_button_x,
@@ -381,7 +508,7 @@ class Game:
                 )
                 time.sleep(0.5)  
 
-            self.screen.blit(self.intro_background, (0, 0))
+            self.screen.blit(intro_background, (0, 0))
             self.screen.blit(title, title_rect)
             self.screen.blit(dif_text, dif_rect)
             self.screen.blit(credits, credits_rect)
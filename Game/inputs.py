@@ -0,0 +1,139 @@
+"""Input sources for the game: the live keyboard or a scripted list of frames."""
+import json
+import pygame
+
+# Actions, as bits of an input frame.
+LEFT = 1
+RIGHT = 2
+UP = 4
+DOWN = 8
+ATTACK = 16
+INTERACT = 32
+QUIT = 64
+OVERLAY = 128
+
+ACTION_NAMES = {
+    'left': LEFT,
+    'right': RIGHT,
+    'up': UP,
+    'down': DOWN,
+    'attack': ATTACK,
+    'interact': INTERACT,
+    'quit': QUIT,
+    'overlay': OVERLAY,
+}
+
+
+class InputFrame:
+    """The input of a single frame: the actions held down and the actions pressed during the frame."""
+
+    def __init__(self, held=0, pressed=0):
+        """Constructor of the input frame.
+
+        Args:
+            held (int): Bits of the actions held down, like the arrow keys.
+            pressed (int): Bits of the actions pressed during the frame, like attacking.
+        """
+        self.held = held
+        self.pressed = pressed
+
+    def is_held(self, action):
+        return bool(self.held & action)
+
+    def was_pressed(self, action):
+        return bool(self.pressed & action)
+
+
+class KeyboardInput:
+    """Reads the input of each frame from the pygame events and the keyboard state."""
+
+    def poll(self):
+        """Reads the input of the current frame.
+
+        Returns:
+            InputFrame: The input of the frame.
+        """
+        pressed = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pressed |= QUIT
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    pressed |= ATTACK
+                if event.key == pygame.K_e:
+                    pressed |= INTERACT
+                if event.key == pygame.K_F3:
+                    pressed |= OVERLAY
+
+        held = 0
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]:
+            held |= LEFT
+        if keys[pygame.K_RIGHT]:
+            held |= RIGHT
+        if keys[pygame.K_UP]:
+            held |= UP
+        if keys[pygame.K_DOWN]:
+            held |= DOWN
+        return InputFrame(held, pressed)
+
+
+class ScriptedInput:
+    """Plays back a fixed list of input frames, for headless simulations and replays.
+       After the end of the script, nothing is pressed. Closing the window still quits.
+    """
+
+    def __init__(self, frames):
+        """Constructor of the scripted input.
+
+        Args:
+            frames (list): The InputFrame of each frame.
+        """
+        self.frames = frames
+        self.position = 0
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads a script from a JSON file.
+           The file holds a list of steps like {"hold": ["left", "up"], "press": ["attack"], "frames": 30}.
+           Held actions are kept for all the frames of the step, pressed actions only happen on its first frame.
+
+        Args:
+            path (str): The path of the script.
+
+        Returns:
+            ScriptedInput: The scripted input.
+        """
+        with open(path) as f:
+            steps = json.load(f)
+
+        frames = []
+        for step in steps:
+            held = 0
+            for name in step.get('hold', []):
+                held |= ACTION_NAMES[name]
+            pressed = 0
+            for name in step.get('press', []):
+                pressed |= ACTION_NAMES[name]
+            frames.append(InputFrame(held, pressed))
+            frames.extend(InputFrame(held) for _ in range(step.get('frames', 1) - 1))
+        return cls(frames)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.frames)
+
+    def poll(self):
+        """Returns the next frame of the script.
+
+        Returns:
+            InputFrame: The input of the frame.
+        """
+        # Reads the events, so the SDL event queue does not fill up. Only closing the window is not scripted.
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            return InputFrame(pressed=QUIT)
+        if self.finished:
+            return InputFrame()
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
@@ -0,0 +1,216 @@
+"""Levels built ahead of time, ready to be swapped in."""
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from config import *
+from sprites import SpriteSheet, LevelChunk, floor_image, wall_image
+from spatial import TileGrid
+
+# Floor spritesheets (floor, floor detail) used from each level on.
+FLOOR_SPRITESHEETS = [
+    (0, 'img/tiles/grass.png', 'img/tiles/grass_flower.png'),
+    (3, 'img/tiles/dirt.png', 'img/tiles/mud.png'),
+    (6, 'img/tiles/stone_brick_floor.png', 'img/tiles/stone_brick_floor_detail.png'),
+]
+
+
+class Level:
+    """A generated level: its tilemap, tile grid, floor spritesheets and the chunk surfaces around the player.
+
+    Building a level creates no sprites and only uses its own random generator, so the next level can be
+    built in a background thread while the current one is played, and the result stays the same for a seed.
+    """
+
+    def __init__(self, game, index, seed, enemy_qtd):
+        """Generates the map and bakes the static tiles of the level.
+
+        Args:
+            game (game.Game): A reference for the Game class.
+            index (int): The number of the level, starting from 0.
+            seed (int): Seed for every random choice of the level.
+            enemy_qtd (int): How many enemies are spawned.
+        """
+        self.game = game
+        self.index = index
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        floor_file, floor_detail_file = [(floor, detail) for first, floor, detail in FLOOR_SPRITESHEETS if index >= first][-1]
+        self.floor_spritesheet = SpriteSheet(floor_file)
+        self.floor_detail_spritesheet = SpriteSheet(floor_detail_file)
+
+        # The map seed is always drawn, so the baked tiles are the same whether the map is cached or not.
+        map_seed = self.rng.getrandbits(64)
+        if game.level_cache is None:
+            self.tilemap = game.generate_map(map_seed, enemy_qtd)
+        else:
+            self.tilemap = game.level_cache.load_or_generate(
+                seed, game.map_width, game.map_height, enemy_qtd, lambda: game.generate_map(map_seed, enemy_qtd))
+        self.tile_grid = TileGrid(self.tilemap, TILESIZE)
+
+        # The chunks around the player are baked with the level, the others by a ChunkStreamer while it is played.
+        self.chunk_seed = self.rng.getrandbits(64)
+        column, row = self.spawns(PLAYER_TILE)[0]
+        self.chunks = {key: self.bake_chunk(*key)
+                       for key in self.visible_chunks((column // CHUNK_SIZE, row // CHUNK_SIZE))}
+
+    def chunks_near(self, area, margin):
+        """Returns the chunks of the map on screen while the player is in a chunk, plus a margin on every side.
+
+        Args:
+            area (tuple): The (column, row) of the chunk the player is in.
+            margin (int): How far outside the screen chunks are included, in pixels.
+
+        Returns:
+            list: The (column, row) of each chunk, ordered by row and then by column.
+        """
+        size = CHUNK_SIZE * TILESIZE
+        map_height, map_width = self.tilemap.shape
+        # The screen can be centered anywhere inside the chunk, up to half a chunk from its center.
+        x = area[0] * size + size // 2
+        y = area[1] * size + size // 2
+        margin += size // 2
+        first_column = max((x - SCREEN_WIDTH // 2 - margin) // size, 0)
+        last_column = min((x + SCREEN_WIDTH // 2 + margin) // size, (map_width - 1) // CHUNK_SIZE)
+        first_row = max((y - SCREEN_HEIGHT // 2 - margin) // size, 0)
+        last_row = min((y + SCREEN_HEIGHT // 2 + margin) // size, (map_height - 1) // CHUNK_SIZE)
+        return [(column, row) for row in range(first_row, last_row + 1) for column in range(first_column, last_column + 1)]
+
+    def visible_chunks(self, area):
+        """Returns the chunks that can be on screen while the player is in a chunk.
+           The margin covers the camera, which is drawn up to one step behind the player.
+
+        Args:
+            area (tuple): The (column, row) of the chunk the player is in.
+
+        Returns:
+            list: The (column, row) of each chunk.
+        """
+        return self.chunks_near(area, max(PLAYER_SPEED, ENEMY_SPEED))
+
+    def prefetched_chunks(self, area):
+        """Returns the chunks to bake ahead while the player is in a chunk: the visible ones and CHUNK_PREFETCH more.
+
+        Args:
+            area (tuple): The (column, row) of the chunk the player is in.
+
+        Returns:
+            list: The (column, row) of each chunk.
+        """
+        return self.chunks_near(area, max(PLAYER_SPEED, ENEMY_SPEED) + CHUNK_PREFETCH * CHUNK_SIZE * TILESIZE)
+
+    def bake_chunk(self, chunk_x, chunk_y):
+        """Bakes the floor, walls and stairs of a chunk of CHUNK_SIZE x CHUNK_SIZE tiles into a single surface.
+           Each chunk chooses its decorations with its own random generator, so chunks can be baked in any order,
+           on any thread, and always look the same.
+
+        Args:
+            chunk_x (int): The chunk column in the map.
+            chunk_y (int): The chunk row in the map.
+
+        Returns:
+            pygame.Surface: The baked tiles. Chunks on the right and bottom borders are cut to the size of the map.
+        """
+        rng = random.Random(f'{self.chunk_seed}/{chunk_x}/{chunk_y}')
+        first_column = chunk_x * CHUNK_SIZE
+        first_row = chunk_y * CHUNK_SIZE
+        tiles = self.tilemap[first_row:first_row + CHUNK_SIZE, first_column:first_column + CHUNK_SIZE]
+        chunk = pygame.Surface((tiles.shape[1] * TILESIZE, tiles.shape[0] * TILESIZE)).convert()
+        stair = self.game.stair_spritesheet.get_sprite(0, 0, TILESIZE, TILESIZE)
+
+        for i, row in enumerate(tiles.tolist()):
+            for j, column in enumerate(row):
+                position = (j * TILESIZE, i * TILESIZE)
+                chunk.blit(floor_image(self, rng), position)
+                if column == WALL_TILE:
+                    chunk.blit(wall_image(self.game, rng), position)
+                if column == STAIR_TILE:
+                    chunk.blit(stair, position)
+        return chunk
+
+    def spawns(self, tile):
+        """Returns the tiles where something spawns, ordered by row and then by column.
+
+        Args:
+            tile (int): The tile code, like ENEMY_TILE.
+
+        Returns:
+            list: The (column, row) of each tile.
+        """
+        return [(column, row) for row, column in np.argwhere(self.tilemap == tile).tolist()]
+
+
+class ChunkStreamer:
+    """Keeps the static tiles of a level baked and on screen only around the player.
+
+    Chunks on screen get a LevelChunk sprite. The chunks up to CHUNK_PREFETCH chunks further are baked ahead on a
+    thread pool, and only the CHUNK_CACHE_SIZE chunks used last are kept, so memory and the sprites to iterate
+    depend on the screen size instead of the map size.
+    """
+
+    def __init__(self, game, level, executor):
+        """Constructor of the streamer. Starts with the chunks baked with the level.
+
+        Args:
+            game (game.Game): A reference for the Game class.
+            level (Level): The level whose chunks are shown.
+            executor (concurrent.futures.Executor): Where the chunks are baked ahead.
+        """
+        self.game = game
+        self.level = level
+        self.executor = executor
+        # Baked surfaces, from the least to the most recently used.
+        self.baked = OrderedDict(level.chunks)
+        self.baking = {}
+        self.sprites = {}
+        self.area = None
+
+    def update(self, rect):
+        """Shows the chunks on the screen around a rect, and bakes the next ones before they are needed.
+
+        Args:
+            rect (pygame.Rect): The rect the camera follows, usually the player.
+        """
+        size = CHUNK_SIZE * TILESIZE
+        area = (rect.centerx // size, rect.centery // size)
+        if area == self.area and not self.baking:
+            return
+        self.area = area
+
+        for key, future in list(self.baking.items()):
+            if future.done():
+                self.baked[key] = future.result()
+                del self.baking[key]
+
+        visible = self.level.visible_chunks(area)
+        for key in self.level.prefetched_chunks(area):
+            if key in self.baked:
+                self.baked.move_to_end(key)
+            elif key not in self.baking:
+                self.baking[key] = self.executor.submit(self.level.bake_chunk, *key)
+
+        for key in visible:
+            if key in self.sprites:
+                continue
+            if key not in self.baked:
+                # A chunk on screen is never left empty: waits for it, which only happens when moving very fast.
+                self.baked[key] = self.baking.pop(key).result()
+            self.baked.move_to_end(key)
+            self.sprites[key] = LevelChunk(self.game, *key, self.baked[key])
+
+        visible = set(visible)
+        for key in [key for key in self.sprites if key not in visible]:
+            self.sprites.pop(key).kill()
+        while len(self.baked) > CHUNK_CACHE_SIZE:
+            self.baked.popitem(last=False)
+
+    def close(self):
+        """Stops baking the chunks of the level and forgets them."""
+        for future in self.baking.values():
+            future.cancel()
+        self.baking.clear()
+        self.baked.clear()
+        self.sprites.clear()
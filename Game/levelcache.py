@@ -0,0 +1,137 @@
+"""Compact on-disk format and cache of generated level maps.
+
+A map file is a small header followed by one byte per tile (the tile codes of config.py), row by row:
+
+    magic        4 bytes   b'GPMP'
+    version      1 byte    FORMAT_VERSION
+    generator    1 byte    mapgen.GENERATOR_VERSION, maps of older generators are generated again
+    width        2 bytes   unsigned, little endian
+    height       2 bytes   unsigned, little endian
+    enemy_qtd    4 bytes   unsigned, little endian
+    seed         8 bytes   unsigned, little endian
+    tiles        width * height bytes
+"""
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import mapgen
+from assets import atomic_write
+
+MAGIC = b'GPMP'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sBBHHIQ')
+
+
+class MapFormatError(Exception):
+    """Raised when a map file is not in the expected format."""
+
+
+def write_map(path, tilemap, seed, enemy_qtd):
+    """Writes a map file.
+
+    Args:
+        path (str): The path of the file.
+        tilemap (numpy.ndarray): The (height, width) matrix of tile codes.
+        seed (int): The seed the map was generated with.
+        enemy_qtd (int): How many enemies the map spawns.
+    """
+    height, width = tilemap.shape
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, mapgen.GENERATOR_VERSION, width, height, enemy_qtd, seed)
+    atomic_write(path, header + np.ascontiguousarray(tilemap, dtype=np.uint8).tobytes())
+
+
+def read_map(path):
+    """Reads a map file through a memory map, copying the tiles out before the map is closed.
+
+    Args:
+        path (str): The path of the file.
+
+    Raises:
+        MapFormatError: If the file is not a map file of this version.
+
+    Returns:
+        tuple: The header as a dict, and the (height, width) matrix of tile codes.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if len(data) < HEADER.size:
+            raise MapFormatError(f'{path} is too short to be a map file.')
+        magic, version, generator, width, height, enemy_qtd, seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise MapFormatError(f'{path} is not a version {FORMAT_VERSION} map file.')
+        if len(data) != HEADER.size + width * height:
+            raise MapFormatError(f'{path} has {len(data) - HEADER.size} tiles instead of {width * height}.')
+        # The copy must be made before the map is closed, and no view of the map may outlive it.
+        tiles = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=HEADER.size).copy()
+
+    header = {
+        'generator': generator,
+        'width': width,
+        'height': height,
+        'enemy_qtd': enemy_qtd,
+        'seed': seed,
+    }
+    return header, tiles.reshape(height, width)
+
+
+class LevelCache:
+    """Directory of generated maps, keyed by seed, size and amount of enemies."""
+
+    def __init__(self, directory):
+        """Constructor of the level cache.
+
+        Args:
+            directory (str): The directory of the map files.
+        """
+        self.directory = directory
+
+    def path(self, seed, width, height, enemy_qtd):
+        """Returns the path of the map file for a key.
+
+        Args:
+            seed (int): The seed of the map.
+            width (int): The width of the map, in tiles.
+            height (int): The height of the map, in tiles.
+            enemy_qtd (int): How many enemies the map spawns.
+
+        Returns:
+            str: The path of the map file.
+        """
+        return os.path.join(self.directory, f'{seed:016x}_{width}x{height}_{enemy_qtd}.map')
+
+    def load_or_generate(self, seed, width, height, enemy_qtd, generate):
+        """Returns the cached map for the key, generating and caching it when it is missing or outdated.
+
+        Args:
+            seed (int): The seed of the map.
+            width (int): The width of the map, in tiles.
+            height (int): The height of the map, in tiles.
+            enemy_qtd (int): How many enemies the map spawns.
+            generate (callable): Function that generates the map when it is not cached.
+
+        Returns:
+            numpy.ndarray: The (height, width) matrix of tile codes.
+        """
+        path = self.path(seed, width, height, enemy_qtd)
+        if os.path.exists(path):
+            try:
+                header, tilemap = read_map(path)
+                key = {'seed': seed, 'width': width, 'height': height, 'enemy_qtd': enemy_qtd}
+                for field, value in key.items():
+                    if header[field] != value:
+                        raise MapFormatError(f'{field} is {header[field]} instead of {value}.')
+                if header['generator'] == mapgen.GENERATOR_VERSION:
+                    return tilemap
+            except (MapFormatError, OSError, ValueError) as e:
+                print(f"Ignoring the cached map {path}: {e}")
+
+        tilemap = generate()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_map(path, tilemap, seed, enemy_qtd)
+        except (OSError, struct.error) as e:
+            # struct.error: the map is too large for the header fields, it is only kept in memory.
+            print(f"Could not write the level cache for {path}: {e}")
+        return tilemap
@@ -1,15 +1,62 @@
-"""The main game script."""
+"""The main game script.
+
+Can also record the first game played, or replay a recording in the window and print its frame times:
+
+    python main.py --record session.rec
+    python main.py --replay session.rec --profile-log replay.csv
+"""
+import argparse
 import pygame
+import random
 import sys
 
 from game import Game
+from inputs import KeyboardInput
+from profiler import FrameProfiler
+from recording import Recording, RecordingInput, ReplayInput
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--seed', type=int, help='Seed for every random choice of the game. Defaults to a random one.')
+parser.add_argument('--record', metavar='PATH', help='Records the first game, to replay it later.')
+parser.add_argument('--replay', metavar='PATH', help='Replays a recording in the window, then prints the frame times.')
+parser.add_argument('--profile-log', metavar='PATH', help='Logs the phase times of every frame, .csv or .jsonl.')
+args = parser.parse_args()
 
-g = Game()
-g.intro_screen()
-g.new()
-while g.running:
+if args.replay:
+    recording = Recording.load(args.replay)
+    g = Game(seed=recording.seed, input_source=ReplayInput(recording))
+    recording.setup(g)
+    g.profiler = FrameProfiler(log_path=args.profile_log)
+    g.new()
     g.main()
-    g.game_over()
+    if not g.input.finished:
+        print('Replay stopped before the end of the recording.')
+    else:
+        print(f'Replay {"matches" if recording.matches(g) else "does not match"} the recording.')
+    print('\n'.join(g.profiler.report()))
+else:
+    seed = args.seed
+    recorder = None
+    if args.record:
+        # Recordings are replayed from their seed, so the game needs one.
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        recorder = RecordingInput(KeyboardInput())
+    g = Game(seed=seed, input_source=recorder)
+    if args.profile_log:
+        g.profiler = FrameProfiler(log_path=args.profile_log)
+    g.intro_screen()
+    g.new()
+    while g.running:
+        g.main()
+        if recorder is not None:
+            # Only the first game is recorded, the next ones are started from the Game Over screen.
+            recorder.recording(g).save(args.record)
+            print(f'Recorded {len(recorder.held)} updates to {args.record}.')
+            g.input = recorder.source
+            recorder = None
+        g.game_over()
 
+g.profiler.close()
 pygame.quit()
 sys.exit()
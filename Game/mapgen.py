@@ -0,0 +1,273 @@
+"""Vectorized procedural generation of the level maps."""
+import numpy as np
+from config import *
+
+# Move of each roll of the drunk agent: left, right, up, down.
+ROLL_X = np.array([-1, 1, 0, 0])
+ROLL_Y = np.array([0, 0, -1, 1])
+# Changes whenever the same seed would give another map, so cached maps are generated again.
+GENERATOR_VERSION = 3
+# Steps walked together by axis_walk before checking the borders.
+WALK_CHUNK = 1024
+# (row, column) step to each neighbour of a tile in flood_fill: up, down, left, right.
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def clamped_walk(start, steps, low, high):
+    """Returns the positions of a walk along one axis where the steps leaving [low, high] are skipped.
+       Each step is the function x -> clip(x + step, low, high), and composing two such clamps gives
+       another clamp, so every position is computed with a prefix scan in log2(len(steps)) vectorized passes.
+
+    Args:
+        start (int): The position before the first step.
+        steps (numpy.ndarray): The step of each move, -1, 0 or 1.
+        low (int): The lowest position allowed.
+        high (int): The highest position allowed.
+
+    Returns:
+        numpy.ndarray: The position after each step.
+    """
+    # Step i is clip(x + shift[i], lows[i], highs[i]). After the scan, it is the composition of steps 0 to i.
+    shift = steps.astype(np.int32)
+    lows = np.full(len(steps), low, dtype=np.int32)
+    highs = np.full(len(steps), high, dtype=np.int32)
+    span = 1
+    while span < len(steps):
+        # Applies the composition ending span steps before, then the current one.
+        new_lows = lows[:-span] + shift[span:]
+        np.maximum(new_lows, lows[span:], out=new_lows)
+        np.minimum(new_lows, highs[span:], out=new_lows)
+        new_highs = highs[:-span] + shift[span:]
+        np.maximum(new_highs, lows[span:], out=new_highs)
+        np.minimum(new_highs, highs[span:], out=new_highs)
+        shift[span:] = shift[:-span] + shift[span:]
+        lows[span:] = new_lows
+        highs[span:] = new_highs
+        span *= 2
+    return np.minimum(np.maximum(start + shift, lows), highs)
+
+
+def axis_walk(start, steps, low, high):
+    """Returns the positions of the agent along one axis. Only the steps that move on this axis are scanned.
+
+    Args:
+        start (int): The position before the first step.
+        steps (numpy.ndarray): The step of each move on this axis, -1, 0 or 1.
+        low (int): The lowest position allowed.
+        high (int): The highest position allowed.
+
+    Returns:
+        numpy.ndarray: The position after each step.
+    """
+    moves = np.flatnonzero(steps)
+    positions = np.empty(len(moves) + 1, dtype=np.int32)
+    positions[0] = start
+
+    # Most stretches of the walk never reach the borders, so each chunk is first walked with a plain
+    # cumulative sum, and only the chunks that would leave the map go through the clamped scan.
+    chunk_count = -(-len(moves) // WALK_CHUNK)
+    chunks = np.zeros(chunk_count * WALK_CHUNK, dtype=np.int32)
+    chunks[:len(moves)] = steps[moves]
+    chunks = chunks.reshape(chunk_count, WALK_CHUNK)
+    offsets = np.cumsum(chunks, axis=1, dtype=np.int32)
+    lowest = offsets.min(axis=1)
+    highest = offsets.max(axis=1)
+    walked = np.empty_like(offsets)
+    position = start
+    for chunk in range(chunk_count):
+        if position + lowest[chunk] >= low and position + highest[chunk] <= high:
+            walked[chunk] = position + offsets[chunk]
+        else:
+            walked[chunk] = clamped_walk(position, chunks[chunk], low, high)
+        position = walked[chunk, -1]
+    positions[1:] = walked.ravel()[:len(moves)]
+    # Each step keeps the position of the last move on this axis before it.
+    last_move = np.zeros(len(steps), dtype=np.int64)
+    last_move[moves] = np.arange(1, len(moves) + 1)
+    np.maximum.accumulate(last_move, out=last_move)
+    return positions[last_move]
+
+
+def drunk_walk(width, height, floor_count, rng, padding=1, max_steps=None):
+    """Carves the floor of a map with a 'drunk' agent, that starts on the center and walks around in a random way removing the walls.
+       The agent walks in batches of steps, and stops when floor_count tiles are carved or after max_steps steps.
+
+    Args:
+        width (int): The width of the map, in tiles.
+        height (int): The height of the map, in tiles.
+        floor_count (int): How many tiles are carved.
+        rng (numpy.random.Generator): The random generator.
+        padding (int): How many tiles of wall are always kept around the map.
+        max_steps (int): Limit of steps of the agent, so the generation time is bounded. Defaults to 64 steps per tile.
+
+    Returns:
+        numpy.ndarray: A (height, width) boolean matrix, True for the carved tiles.
+    """
+    if max_steps is None:
+        max_steps = 64 * width * height
+    floor_count = min(floor_count, (width - 2 * padding) * (height - 2 * padding))
+
+    carved = np.zeros(width * height, dtype=bool)
+    x = width // 2
+    y = height // 2
+    carved_count = 0
+    steps = 0
+    while carved_count < floor_count and steps < max_steps:
+        # Large batches keep the Python overhead low, small ones avoid wasting steps on small maps.
+        batch = int(min(max(4096, 4 * (floor_count - carved_count)), 1 << 20, max_steps - steps))
+        rolls = rng.integers(0, 4, size=batch)
+        xs = axis_walk(x, ROLL_X[rolls], padding, width - 1 - padding)
+        ys = axis_walk(y, ROLL_Y[rolls], padding, height - 1 - padding)
+
+        # The agent carves where it stands, then moves.
+        visited = np.concatenate(([y * width + x], ys[:-1].astype(np.int64) * width + xs[:-1]))
+        x = int(xs[-1])
+        y = int(ys[-1])
+        steps += batch
+
+        fresh = visited[~carved[visited]]
+        carved[fresh] = True
+        total = np.count_nonzero(carved)
+        if total > floor_count:
+            # The agent carved too much in this batch: only keeps the first new tiles it walked on.
+            carved[fresh] = False
+            _, first = np.unique(fresh, return_index=True)
+            carved[fresh[np.sort(first)][:floor_count - carved_count]] = True
+            total = floor_count
+        carved_count = total
+
+    return carved.reshape(height, width)
+
+
+def flood_fill(passable, start, return_order=False):
+    """Returns how many steps each tile is from a start tile, with a breadth first search over the passable tiles.
+       The whole frontier of each distance is expanded together, so the search costs a few vectorized passes per
+       distance instead of Python work per tile.
+
+    Args:
+        passable (numpy.ndarray): A (height, width) boolean matrix, True for the tiles that can be walked on.
+        start (tuple): The (column, row) of the start tile.
+        return_order (bool): Also returns the reached tiles in the order they were reached.
+
+    Returns:
+        numpy.ndarray: A (height, width) matrix of steps, -1 for the tiles that cannot be reached.
+        numpy.ndarray: Only with return_order, the flat index of each reached tile, from the nearest to the farthest.
+            The tiles of each distance are next to each other, so they are buckets of the tiles by distance.
+    """
+    height, width = passable.shape
+    # A border of wall keeps the neighbours of every tile inside the padded map.
+    walkable = np.pad(passable, 1).ravel()
+    offsets = np.array([row * (width + 2) + column for row, column in NEIGHBOURS])
+    distance = np.full(walkable.shape, -1, dtype=np.int32)
+
+    column, row = start
+    frontier = np.array([(row + 1) * (width + 2) + column + 1])
+    frontier = frontier[walkable[frontier]]
+    distance[frontier] = 0
+    frontiers = [frontier]
+    steps = 0
+    while len(frontier):
+        steps += 1
+        neighbours = (frontier[:, None] + offsets).ravel()
+        # A tile can be the neighbour of several tiles of the frontier, so the new frontier is deduplicated.
+        frontier = np.unique(neighbours[walkable[neighbours] & (distance[neighbours] < 0)])
+        distance[frontier] = steps
+        frontiers.append(frontier)
+    distance = distance.reshape(height + 2, width + 2)[1:-1, 1:-1]
+    if not return_order:
+        return distance
+    padded = np.concatenate(frontiers)
+    return distance, (padded // (width + 2) - 1) * width + padded % (width + 2) - 1
+
+
+def take_from_buckets(tiles, starts, taken, counts):
+    """Takes the next tiles of some buckets.
+
+    Args:
+        tiles (numpy.ndarray): The tiles, bucket after bucket.
+        starts (numpy.ndarray): The index of the first tile of each bucket.
+        taken (numpy.ndarray): How many tiles of each bucket were already taken, updated in place.
+        counts (numpy.ndarray): How many tiles are taken from each bucket.
+
+    Returns:
+        numpy.ndarray: The tiles taken.
+    """
+    first = np.repeat(starts + taken, counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    taken += counts
+    return tiles[first + within]
+
+
+def generate_map(width, height, enemy_count, rng, percentage_of_floor=0.6, enemy_distance=0.3, stair_distance=0.7):
+    """Generates the map for a level.
+       A flood fill from the player buckets the reachable tiles by walking distance, and the stairs, then the enemies,
+       are drawn from the buckets, each tile weighing its distance, so farther tiles are more likely. The stairs can
+       always be reached, and the generation time only depends on the map size, whatever the enemy count.
+
+    Args:
+        width (int): The width of the map, in tiles.
+        height (int): The height of the map, in tiles.
+        enemy_count (int): How many enemies are spawned, at most one per reachable tile left after the stairs.
+        rng (numpy.random.Generator): The random generator.
+        percentage_of_floor (float): The part of the map that is carved into floor.
+        enemy_distance (float): Minimum walking distance of the enemies to the player, as a part of the distance
+            to the farthest tile. When there are not enough tiles that far, the rest go on the farthest ones left.
+        stair_distance (float): Minimum walking distance of the stairs to the player, as a part of the distance
+            to the farthest tile.
+
+    Raises:
+        ValueError: If the player cannot walk to any tile, like on maps too small to carve more than one tile.
+
+    Returns:
+        numpy.ndarray: A (height, width) matrix with the tile code of each tile.
+    """
+    tilemap = np.full((height, width), WALL_TILE, dtype=np.uint8)
+    carved = drunk_walk(width, height, int(width * height * percentage_of_floor) + 1, rng)
+    tilemap[carved] = FLOOR_TILE
+
+    player_y = height // 2
+    player_x = width // 2
+    tilemap[player_y, player_x] = PLAYER_TILE
+
+    # Every tile the player can walk to, in buckets of the same distance, the player alone in the first one.
+    distance, tiles = flood_fill(carved, (player_x, player_y), return_order=True)
+    counts = np.bincount(distance.flat[tiles])
+    if len(counts) < 2:
+        raise ValueError(f'The {width}x{height} map has no tile the player can walk to for the stairs.')
+    starts = np.cumsum(counts) - counts
+    farthest = len(counts) - 1
+    # Tiles of the same distance are equally likely, so each bucket is shuffled once and taken from the start.
+    for start, count in zip(starts.tolist(), counts.tolist()):
+        rng.shuffle(tiles[start:start + count])
+    taken = np.zeros(len(counts), dtype=np.int64)
+    taken[0] = 1
+    distances = np.arange(len(counts))
+
+    # Spawn stairs first, so they always get a tile.
+    first_far = min(int(np.ceil(stair_distance * farthest)), farthest)
+    weights = np.where(distances >= first_far, counts * distances, 0)
+    cumulative = np.cumsum(weights)
+    stairs = np.zeros(len(counts), dtype=np.int64)
+    stairs[np.searchsorted(cumulative, rng.random() * cumulative[-1], side='right')] = 1
+    tilemap.flat[take_from_buckets(tiles, starts, taken, stairs)] = STAIR_TILE
+
+    # Spawn enemies from a certain distance from the player. A bucket can get more enemies than it has tiles left,
+    # then the extra ones are drawn again from the buckets with room.
+    remaining = min(enemy_count, int((counts - taken).sum()))
+    first_far = min(int(np.ceil(enemy_distance * farthest)), farthest)
+    far = distances >= first_far
+    while remaining:
+        room = counts - taken
+        weights = np.where(far, room * distances, 0)
+        if not weights.any():
+            break
+        drawn = np.minimum(rng.multinomial(remaining, weights / weights.sum()), room)
+        tilemap.flat[take_from_buckets(tiles, starts, taken, drawn)] = ENEMY_TILE
+        remaining -= int(drawn.sum())
+    if remaining:
+        # Not enough far tiles: the rest go on the farthest remaining ones.
+        room = np.where(far, 0, counts - taken)[::-1]
+        drawn = np.clip(remaining - (np.cumsum(room) - room), 0, room)[::-1]
+        tilemap.flat[take_from_buckets(tiles, starts, taken, drawn)] = ENEMY_TILE
+
+    return tilemap
@@ -0,0 +1,93 @@
+"""Flow field that leads every enemy to the player, computed once for all of them."""
+import numpy as np
+
+from config import *
+
+# Directions of the field, in the order of the facings of the enemy swarm, and the tile step of each one.
+DIRECTIONS = ('down', 'up', 'right', 'left')
+STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+# Tiles the search did not reach, and the target tile itself.
+UNREACHED = -1
+TARGET = len(DIRECTIONS)
+
+
+class FlowField:
+    """Breadth first search from a target tile, like the tile of the player, over the floor of a level.
+
+    Each tile reached keeps the direction of the next tile on a shortest path to the target, so any number of
+    enemies find their way by reading their own tile. The search only runs again when the target changes tile,
+    and stops max_distance tiles away from it, so its cost grows neither with the enemies nor with the map.
+    """
+
+    def __init__(self, tile_grid, max_distance=CHASE_DISTANCE):
+        """Constructor of the flow field. Nothing is reached before the first update.
+
+        Args:
+            tile_grid (spatial.TileGrid): The walls of the level.
+            max_distance (int): How many steps away from the target the search goes.
+        """
+        self.tile_grid = tile_grid
+        self.max_distance = max_distance
+        # Direction of each tile, indexed by row and then by column, like the tilemap.
+        self.directions = np.full((tile_grid.height, tile_grid.width), UNREACHED, dtype=np.int8)
+        self.target = None
+        # Flat indexes of the tiles reached by the last search, to clear them on the next one.
+        self.reached = []
+
+    def update(self, tile):
+        """Searches again from the target tile, if it changed since the last search.
+
+        Args:
+            tile (tuple): The (column, row) of the target.
+
+        Returns:
+            bool: True if the field changed.
+        """
+        if tile == self.target:
+            return False
+        self.target = tile
+        directions = self.directions.reshape(-1)
+        directions[self.reached] = UNREACHED
+
+        walls = self.tile_grid.walls
+        width = self.tile_grid.width
+        height = self.tile_grid.height
+        column, row = tile
+        if not (0 <= column < width and 0 <= row < height) or walls[row][column]:
+            self.reached = []
+            return True
+
+        # The search goes one distance at a time, so the first direction found for a tile is on a shortest path.
+        found = {tile: TARGET}
+        frontier = [tile]
+        for distance in range(self.max_distance):
+            next_frontier = []
+            for column, row in frontier:
+                for direction, (step_x, step_y) in enumerate(STEPS):
+                    # The neighbour that reaches this tile with a step in this direction.
+                    x = column - step_x
+                    y = row - step_y
+                    if 0 <= x < width and 0 <= y < height and not walls[y][x] and (x, y) not in found:
+                        found[(x, y)] = direction
+                        next_frontier.append((x, y))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        self.reached = [y * width + x for x, y in found]
+        directions[self.reached] = list(found.values())
+        return True
+
+    def direction(self, tile):
+        """Returns the direction of a tile: the index in DIRECTIONS of its next step, TARGET or UNREACHED.
+
+        Args:
+            tile (tuple): The (column, row) of the tile.
+
+        Returns:
+            int: The direction.
+        """
+        column, row = tile
+        if 0 <= column < self.tile_grid.width and 0 <= row < self.tile_grid.height:
+            return int(self.directions[row, column])
+        return UNREACHED
@@ -0,0 +1,212 @@
+"""Per-phase timing of the game frames, with rolling percentiles, an on-screen overlay and an optional log on disk."""
+import csv
+import json
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pygame
+
+from config import *
+
+
+class ProfileWriter:
+    """Writes the frame records on a background thread, so the game never waits for the disk.
+
+    Files ending with .csv get one 'frame,metric,value' row per metric, any other file one JSON object per frame.
+    """
+
+    def __init__(self, path):
+        """Constructor of the writer. Starts the writing thread.
+
+        Args:
+            path (str): The path of the log file.
+        """
+        self.path = path
+        self.records = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name='profile-writer', daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        """Queues a frame record to be written.
+
+        Args:
+            record (dict): The frame number and the value of each metric.
+        """
+        self.records.put(record)
+
+    def run(self):
+        with open(self.path, 'w', newline='') as f:
+            if self.path.endswith('.csv'):
+                writer = csv.writer(f)
+                writer.writerow(['frame', 'metric', 'value'])
+            while True:
+                record = self.records.get()
+                if record is None:
+                    return
+                if self.path.endswith('.csv'):
+                    frame = record['frame']
+                    writer.writerows((frame, metric, value) for metric, value in record.items() if metric != 'frame')
+                else:
+                    f.write(json.dumps(record) + '\n')
+
+    def close(self):
+        """Writes the remaining records and stops the thread."""
+        self.records.put(None)
+        self.thread.join()
+
+
+class FrameProfiler:
+    """Measures how long each phase of the frames takes, and counts the sprites of each group.
+
+    Phases are timed with time.perf_counter_ns and summed over the frame, so the updates that catch up a slow
+    frame are added together. The last PROFILER_WINDOW frames are kept to compute the percentiles.
+    """
+
+    def __init__(self, window=PROFILER_WINDOW, log_path=PROFILER_LOG):
+        """Constructor of the profiler.
+
+        Args:
+            window (int): How many frames the percentiles are computed over.
+            log_path (str): File where every frame is logged, .csv or .jsonl. None disables the log.
+        """
+        self.window = window
+        self.history = {}
+        self.phases = {}
+        self.counts = {}
+        self.frame = 0
+        self.writer = ProfileWriter(log_path) if log_path else None
+
+        self.overlay = False
+        self.overlay_font = None
+        self.overlay_image = None
+
+    @contextmanager
+    def phase(self, name):
+        """Times the code inside the with block as a phase of the frame.
+
+        Args:
+            name (str): The name of the phase.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter_ns() - start)
+
+    def add(self, name, nanoseconds):
+        """Adds time to a phase of the current frame.
+
+        Args:
+            name (str): The name of the phase.
+            nanoseconds (int): The time spent.
+        """
+        self.phases[name] = self.phases.get(name, 0) + nanoseconds
+
+    def count(self, name, value):
+        """Records a count of the current frame, like the size of a sprite group.
+
+        Args:
+            name (str): The name of the count.
+            value (int): The count.
+        """
+        self.counts[name] = value
+
+    def update_by_type(self, group):
+        """Updates the sprites of a group, timing each sprite type as an 'update.<type>' phase.
+           Sprites are still updated in the group order, so the result is the same as group.update().
+
+        Args:
+            group (pygame.sprite.AbstractGroup): The group to update.
+        """
+        kind = None
+        start = time.perf_counter_ns()
+        for sprite in group.sprites():
+            if type(sprite) is not kind:
+                now = time.perf_counter_ns()
+                if kind is not None:
+                    self.add('update.' + kind.__name__, now - start)
+                kind = type(sprite)
+                start = now
+            sprite.update()
+        if kind is not None:
+            self.add('update.' + kind.__name__, time.perf_counter_ns() - start)
+
+    def end_frame(self):
+        """Closes the current frame: keeps its times for the percentiles and logs it."""
+        for name, nanoseconds in self.phases.items():
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.window)
+            history.append(nanoseconds / 1e6)
+
+        if self.writer is not None:
+            record = {'frame': self.frame}
+            record.update((name, round(nanoseconds / 1e6, 4)) for name, nanoseconds in self.phases.items())
+            record.update(self.counts)
+            self.writer.write(record)
+
+        self.frame += 1
+        self.phases = {}
+
+    def percentiles(self, name):
+        """Returns the p50, p95 and p99 time of a phase over the last frames, in milliseconds.
+
+        Args:
+            name (str): The name of the phase.
+
+        Returns:
+            tuple: The (p50, p95, p99) times, all 0 before two frames are measured.
+        """
+        history = self.history.get(name)
+        if not history or len(history) < 2:
+            return 0.0, 0.0, 0.0
+        cuts = statistics.quantiles(history, n=100, method='inclusive')
+        return cuts[49], cuts[94], cuts[98]
+
+    def report(self):
+        """Returns a line of text for each phase and count, as shown on the overlay.
+
+        Returns:
+            list: The lines of the report.
+        """
+        lines = [f'{"phase":18} {"p50":>7} {"p95":>7} {"p99":>7} ms']
+        for name in sorted(self.history):
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f'{name:18} {p50:7.3f} {p95:7.3f} {p99:7.3f}')
+        lines.extend(f'{name:18} {value:7}' for name, value in self.counts.items())
+        return lines
+
+    def draw(self, surface):
+        """Draws the overlay on the top left corner of a surface, when it is enabled.
+           The text is only rendered again a few times per second, so the overlay itself stays cheap.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+
+        Returns:
+            pygame.Rect: The area drawn, or None if the overlay is disabled.
+        """
+        if not self.overlay:
+            return None
+        if self.overlay_image is None or self.frame % PROFILER_OVERLAY_INTERVAL == 0:
+            if self.overlay_font is None:
+                self.overlay_font = pygame.font.SysFont('monospace', 14)
+            lines = [self.overlay_font.render(line, True, WHITE) for line in self.report()]
+            self.overlay_image = pygame.Surface((max(line.get_width() for line in lines) + 8,
+                                                 sum(line.get_height() for line in lines) + 8))
+            self.overlay_image.fill(BLACK)
+            y = 4
+            for line in lines:
+                self.overlay_image.blit(line, (4, y))
+                y += line.get_height()
+        return surface.blit(self.overlay_image, (0, 0))
+
+    def close(self):
+        """Finishes writing the log, if any."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,187 @@
+"""Recording of the input of a game, and its replay, so the same session can be played again update by update.
+
+Every random choice of a game comes from its seed, and the input is read once per update, so the seed, the game
+settings and the input of each update are enough to play a session again exactly, however fast the frames are.
+A recording file is a small header followed by the zlib compressed input, first the held byte of every update,
+then the pressed byte of every update:
+
+    magic         4 bytes   b'GPRP'
+    version       1 byte    FORMAT_VERSION
+    seed          8 bytes   unsigned, little endian
+    difficulty    1 byte    index in DIFFICULTIES
+    enemy_engine  1 byte    index in ENEMY_ENGINES
+    movement      1 byte    index in ENEMY_MOVEMENTS
+    map_width     4 bytes   unsigned, little endian
+    map_height    4 bytes   unsigned, little endian
+    updates       4 bytes   unsigned, little endian
+    digest        20 bytes  Game.state_digest at the end of the recording
+    input         zlib compressed, 2 * updates bytes
+"""
+import struct
+import zlib
+
+from inputs import InputFrame, ScriptedInput, QUIT
+
+MAGIC = b'GPRP'
+FORMAT_VERSION = 3
+HEADER = struct.Struct('<4sBQBBBIII20s')
+ENEMY_ENGINES = ('sprites', 'arrays')
+ENEMY_MOVEMENTS = ('wander', 'chase')
+
+
+class RecordingFormatError(Exception):
+    """Raised when a recording file is not in the expected format."""
+
+
+class Recording:
+    """A recorded session: the settings to start the same game, and the input of every update."""
+
+    def __init__(self, seed, difficulty, enemy_engine, enemy_movement, map_width, map_height, held, pressed, digest):
+        """Constructor of the recording.
+
+        Args:
+            seed (int): The seed of the game.
+            difficulty (int): The index of the difficulty in DIFFICULTIES.
+            enemy_engine (str): How the enemies were simulated, see ENEMY_ENGINE.
+            enemy_movement (str): How the enemies moved, see ENEMY_MOVEMENT.
+            map_width (int): The width of the maps, in tiles.
+            map_height (int): The height of the maps, in tiles.
+            held (bytes): The held actions of each update.
+            pressed (bytes): The pressed actions of each update.
+            digest (bytes): The state of the game at the end, to check the replay.
+        """
+        self.seed = seed
+        self.difficulty = difficulty
+        self.enemy_engine = enemy_engine
+        self.enemy_movement = enemy_movement
+        self.map_width = map_width
+        self.map_height = map_height
+        self.held = held
+        self.pressed = pressed
+        self.digest = digest
+
+    def __len__(self):
+        return len(self.held)
+
+    def frames(self):
+        """Returns the InputFrame of each update."""
+        return [InputFrame(held, pressed) for held, pressed in zip(self.held, self.pressed)]
+
+    def setup(self, game):
+        """Gives a game the recorded settings. Must be called before game.new().
+
+        Args:
+            game (game.Game): A game created with the seed of the recording.
+        """
+        game.set_difficulty(self.difficulty)
+        game.enemy_engine = self.enemy_engine
+        game.enemy_movement = self.enemy_movement
+        game.map_width = self.map_width
+        game.map_height = self.map_height
+
+    def matches(self, game):
+        """Tests if a replayed game ended in the same state as the recorded one.
+
+        Args:
+            game (game.Game): The game that replayed the recording.
+        """
+        return game.state_digest() == self.digest
+
+    def save(self, path):
+        """Writes the recording file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.seed, self.difficulty,
+                             ENEMY_ENGINES.index(self.enemy_engine), ENEMY_MOVEMENTS.index(self.enemy_movement),
+                             self.map_width, self.map_height,
+                             len(self), self.digest)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(zlib.compress(bytes(self.held) + bytes(self.pressed), 9))
+
+    @classmethod
+    def load(cls, path):
+        """Reads a recording file.
+
+        Args:
+            path (str): The path of the file.
+
+        Raises:
+            RecordingFormatError: If the file is not a recording of this version.
+
+        Returns:
+            Recording: The recording.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise RecordingFormatError(f'{path} is too short to be a recording.')
+        magic, version, seed, difficulty, engine, movement, map_width, map_height, updates, digest = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise RecordingFormatError(f'{path} is not a version {FORMAT_VERSION} recording.')
+        try:
+            frames = zlib.decompress(data[HEADER.size:])
+        except zlib.error as e:
+            raise RecordingFormatError(f'{path} has corrupted input: {e}.') from e
+        if len(frames) != 2 * updates:
+            raise RecordingFormatError(f'{path} has {len(frames) // 2} updates instead of {updates}.')
+        return cls(seed, difficulty, ENEMY_ENGINES[engine], ENEMY_MOVEMENTS[movement], map_width, map_height,
+                   frames[:updates], frames[updates:], digest)
+
+
+class RecordingInput:
+    """Records the input of another source, like the keyboard, while the game plays it."""
+
+    def __init__(self, source):
+        """Constructor of the recording input.
+
+        Args:
+            source (object): Where the input actually comes from, like inputs.KeyboardInput.
+        """
+        self.source = source
+        self.held = bytearray()
+        self.pressed = bytearray()
+
+    def poll(self):
+        """Reads the input of the current update from the source, and records it.
+
+        Returns:
+            InputFrame: The input of the update.
+        """
+        frame = self.source.poll()
+        self.held.append(frame.held)
+        self.pressed.append(frame.pressed)
+        return frame
+
+    def recording(self, game):
+        """Returns what was recorded so far, with the settings and the current state of the game.
+
+        Args:
+            game (game.Game): The game that read the input. It must have been given a seed.
+
+        Returns:
+            Recording: The recording.
+        """
+        return Recording(game.seed, game.difficulty, game.enemy_engine, game.enemy_movement,
+                         game.map_width, game.map_height, bytes(self.held), bytes(self.pressed), game.state_digest())
+
+
+class ReplayInput(ScriptedInput):
+    """Plays back a recording. After the last recorded update it presses QUIT, so the replay stops there."""
+
+    def __init__(self, recording):
+        """Constructor of the replay input.
+
+        Args:
+            recording (Recording): The recording to play.
+        """
+        super().__init__(recording.frames())
+        self.recording = recording
+
+    def poll(self):
+        finished = self.finished
+        frame = super().poll()
+        return InputFrame(pressed=QUIT) if finished else frame
@@ -0,0 +1,72 @@
+"""Runs the game headless, with a fixed seed and scripted input, as fast as possible.
+Can also record the run, or replay a recording made in the window or by another version of the game."""
+import argparse
+import time
+
+from config import *
+from game import Game
+from inputs import ScriptedInput
+from profiler import FrameProfiler
+from recording import Recording, RecordingInput, ReplayInput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, help='Number of frames to simulate. Defaults to 10000, or the whole replay.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for every random choice of the game.')
+    parser.add_argument('--difficulty', type=int, default=0, choices=range(len(DIFFICULTIES)),
+                        help='Index of the difficulty: 0 for Easy, 1 for Hard, 2 for Impossible.')
+    parser.add_argument('--script', help='JSON input script, see inputs.ScriptedInput.from_file. Defaults to no input.')
+    parser.add_argument('--enemy-engine', choices=['sprites', 'arrays'], default=ENEMY_ENGINE,
+                        help='How the enemies are simulated, see ENEMY_ENGINE.')
+    parser.add_argument('--enemy-movement', choices=['wander', 'chase'], default=ENEMY_MOVEMENT,
+                        help='How the enemies move, see ENEMY_MOVEMENT.')
+    parser.add_argument('--profile', action='store_true', help='Prints the time percentiles of each phase.')
+    parser.add_argument('--profile-log', metavar='PATH', help='Logs the phase times of every frame, .csv or .jsonl.')
+    parser.add_argument('--render', action='store_true', help='Also draws every frame on the dummy display.')
+    parser.add_argument('--record', metavar='PATH', help='Records the run, to replay it later.')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='Replays a recording, with its seed and settings, instead of the other options.')
+    args = parser.parse_args()
+
+    if args.replay:
+        recording = Recording.load(args.replay)
+        game = Game(headless=True, seed=recording.seed, input_source=ReplayInput(recording))
+        recording.setup(game)
+        # The last update of the replay presses QUIT.
+        frame_limit = len(recording) + 1
+    else:
+        script = ScriptedInput.from_file(args.script) if args.script else ScriptedInput([])
+        game = Game(headless=True, seed=args.seed, input_source=RecordingInput(script) if args.record else script)
+        game.set_difficulty(args.difficulty)
+        game.enemy_engine = args.enemy_engine
+        game.enemy_movement = args.enemy_movement
+        frame_limit = 10000
+    game.profiler = FrameProfiler(log_path=args.profile_log)
+    game.new()
+
+    start = time.perf_counter()
+    frames = game.simulate(args.frames or frame_limit, render=args.render)
+    elapsed = time.perf_counter() - start
+    # QUIT ends both the game and the program, the death of the player only the game.
+    if game.playing:
+        ending = 'player alive'
+    elif not game.running:
+        ending = 'quit'
+    else:
+        ending = 'player dead'
+    print(f'Simulated {frames} frames in {elapsed:.3f}s ({frames / elapsed:.0f} frames/s), '
+          f'level {game.current_level}, {len(game.enemies)} enemies left, {ending} at {game.player.rect.topleft}.')
+    if args.replay and not game.input.finished:
+        print('Replay stopped before the end of the recording.')
+    elif args.replay:
+        print(f'Replay {"matches" if recording.matches(game) else "does not match"} the recording.')
+    elif args.record:
+        game.input.recording(game).save(args.record)
+    if args.profile:
+        print('\n'.join(game.profiler.report()))
+    game.profiler.close()
+
+
+if __name__ == '__main__':
+    main()
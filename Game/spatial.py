@@ -0,0 +1,278 @@
+"""Spatial indexes used to query objects by area."""
+import math
+import pygame
+from config import *
+
+
+class SpatialHash:
+    """Uniform grid that buckets objects by the cells their rect overlaps.
+
+    Each object keeps a reference to its own rect, so moving objects only need to call move,
+    which only touches the buckets when the object crosses a cell border.
+    """
+
+    def __init__(self, cell_size):
+        """Constructor of the spatial hash.
+
+        Args:
+            cell_size (int): The width and height of each cell, in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        # Object -> (rect, (first column, first row, last column, last row)).
+        self.entries = {}
+
+    def cell_span(self, rect):
+        """Returns the range of cells that a rect overlaps.
+
+        Args:
+            rect (pygame.Rect): The rect to test.
+
+        Returns:
+            tuple: The (first column, first row, last column, last row) of the rect.
+        """
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, obj, rect):
+        """Adds an object to the index.
+
+        Args:
+            obj (object): The object to index.
+            rect (pygame.Rect): The rect of the object. The reference is kept and read again on moves and queries.
+        """
+        if obj in self.entries:
+            self.remove(obj)
+        span = self.cell_span(rect)
+        self.entries[obj] = (rect, span)
+        self.add_to_cells(obj, span)
+
+    def remove(self, obj):
+        """Removes an object from the index, if it is indexed.
+
+        Args:
+            obj (object): The object to remove.
+        """
+        entry = self.entries.pop(obj, None)
+        if entry is not None:
+            self.remove_from_cells(obj, entry[1])
+
+    def move(self, obj, rect):
+        """Updates the cells of an object after it moved.
+
+        Args:
+            obj (object): The object that moved.
+            rect (pygame.Rect): The current rect of the object.
+        """
+        entry = self.entries.get(obj)
+        if entry is None:
+            self.insert(obj, rect)
+            return
+        span = self.cell_span(rect)
+        if span != entry[1]:
+            self.remove_from_cells(obj, entry[1])
+            self.add_to_cells(obj, span)
+        self.entries[obj] = (rect, span)
+
+    def query_rect(self, rect):
+        """Returns every object whose rect intersects the given rect.
+
+        Args:
+            rect (pygame.Rect): The area to search.
+
+        Returns:
+            set: The objects inside the area.
+        """
+        found = set()
+        cells = self.cells
+        first_column, first_row, last_column, last_row = self.cell_span(rect)
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                bucket = cells.get((column, row))
+                if bucket:
+                    found.update(bucket)
+        entries = self.entries
+        return {obj for obj in found if entries[obj][0].colliderect(rect)}
+
+    def query_radius(self, center, radius):
+        """Returns every object whose rect is within a distance of a point.
+
+        Args:
+            center (tuple): The (x, y) point to search around.
+            radius (float): The search distance, in pixels.
+
+        Returns:
+            set: The objects inside the circle.
+        """
+        x, y = center
+        area = pygame.Rect(math.floor(x - radius), math.floor(y - radius),
+                           math.ceil(radius * 2) + 1, math.ceil(radius * 2) + 1)
+        found = set()
+        for obj in self.query_rect(area):
+            rect = self.entries[obj][0]
+            # Distance from the point to the closest point of the rect.
+            distance_x = max(rect.left - x, 0, x - rect.right)
+            distance_y = max(rect.top - y, 0, y - rect.bottom)
+            if distance_x * distance_x + distance_y * distance_y <= radius * radius:
+                found.add(obj)
+        return found
+
+    def clear(self):
+        """Removes every object from the index."""
+        self.cells.clear()
+        self.entries.clear()
+
+    def add_to_cells(self, obj, span):
+        first_column, first_row, last_column, last_row = span
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                self.cells.setdefault((column, row), set()).add(obj)
+
+    def remove_from_cells(self, obj, span):
+        first_column, first_row, last_column, last_row = span
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                bucket = self.cells.get((column, row))
+                if bucket is not None:
+                    bucket.discard(obj)
+                    if not bucket:
+                        del self.cells[(column, row)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+
+class SpatialGroup(pygame.sprite.LayeredUpdates):
+    """LayeredUpdates group that also keeps its sprites in a SpatialHash, so it can be queried by area.
+
+    Sprites that move must call reindex after changing their rect.
+    """
+
+    def __init__(self, cell_size, *sprites, **kwargs):
+        """Constructor of the spatial group.
+
+        Args:
+            cell_size (int): The cell size of the spatial hash, in pixels.
+        """
+        self.index = SpatialHash(cell_size)
+        # Sprites are usually added to their groups before their rect exists, so they are indexed on the next query.
+        self.pending = set()
+        # Insertion order, used to keep the LayeredUpdates drawing order between sprites of the same layer.
+        self.order = {}
+        self.next_order = 0
+        super().__init__(*sprites, **kwargs)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.order[sprite] = self.next_order
+        self.next_order += 1
+        self.pending.add(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.order[sprite]
+        self.pending.discard(sprite)
+        self.index.remove(sprite)
+
+    def reindex(self, sprite):
+        """Updates the cells of a sprite after it moved.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite that moved.
+        """
+        if sprite in self.order and sprite not in self.pending:
+            self.index.move(sprite, sprite.rect)
+
+    def query(self, rect):
+        """Returns the sprites that intersect a rect, in drawing order (by layer, then by insertion).
+
+        Args:
+            rect (pygame.Rect): The area to search.
+
+        Returns:
+            list: The sprites inside the area.
+        """
+        self.flush()
+        return self.in_order(self.index.query_rect(rect))
+
+    def query_radius(self, center, radius):
+        """Returns the sprites within a distance of a point, in drawing order.
+
+        Args:
+            center (tuple): The (x, y) point to search around.
+            radius (float): The search distance, in pixels.
+
+        Returns:
+            list: The sprites inside the circle.
+        """
+        self.flush()
+        return self.in_order(self.index.query_radius(center, radius))
+
+    def flush(self):
+        """Indexes the sprites added since the last query."""
+        if self.pending:
+            for sprite in self.pending:
+                self.index.insert(sprite, sprite.rect)
+            self.pending.clear()
+
+    def in_order(self, sprites):
+        layers = self._spritelayers
+        order = self.order
+        return sorted(sprites, key=lambda sprite: (layers[sprite], order[sprite]))
+
+
+def reindex(sprite):
+    """Updates the cells of a sprite in every SpatialGroup it belongs to. Must be called after the sprite moves.
+
+    Args:
+        sprite (pygame.sprite.Sprite): The sprite that moved.
+    """
+    # The game sprites keep their initial groups in a 'groups' attribute, which hides the Sprite.groups method.
+    for group in pygame.sprite.Sprite.groups(sprite):
+        if isinstance(group, SpatialGroup):
+            group.reindex(sprite)
+
+
+class TileGrid:
+    """Grid with the walls of a level, used to find the walls a rect overlaps in constant time."""
+
+    def __init__(self, tilemap, tile_size):
+        """Constructor of the tile grid.
+
+        Args:
+            tilemap (numpy.ndarray): The level matrix returned by Game.generate_map.
+            tile_size (int): The width and height of each tile, in pixels.
+        """
+        self.tile_size = tile_size
+        # The boolean matrix is kept for batched checks, the lists are faster to index one tile at a time.
+        self.mask = tilemap == WALL_TILE
+        self.walls = self.mask.tolist()
+        self.height = len(self.walls)
+        self.width = len(self.walls[0])
+
+    def hits(self, rect):
+        """Returns the rects of the walls that a rect overlaps, ordered by row and then by column.
+
+        Args:
+            rect (pygame.Rect): The rect to test.
+
+        Returns:
+            list: The pygame.Rect of each wall hit.
+        """
+        size = self.tile_size
+        first_column = max(rect.left // size, 0)
+        last_column = min((rect.right - 1) // size, self.width - 1)
+        first_row = max(rect.top // size, 0)
+        last_row = min((rect.bottom - 1) // size, self.height - 1)
+
+        hits = []
+        for row in range(first_row, last_row + 1):
+            walls = self.walls[row]
+            for column in range(first_column, last_column + 1):
+                if walls[column]:
+                    hits.append(pygame.Rect(column * size, row * size, size, size))
+        return hits
@@ -1,22 +1,32 @@
 import pygame
 from config import *
-import math
-import random
+from assets import frame_cache, sounds, images, bundle, texts
+from spatial import reindex
+from inputs import LEFT, RIGHT, UP, DOWN
+from pathfinding import DIRECTIONS, STEPS, UNREACHED, TARGET
 
 
 class SpriteSheet:
     """Class that holds a spritesheet image."""
 
     def __init__(self, file):
-        """Loads the image containing the sprites.
+        """Starts loading the image containing the sprites in the background, unless its frames are in the asset bundle.
 
         Args:
             file (str): The path of the file containing the sprites.
         """
-        self.sheet = pygame.image.load(file).convert()
+        self.file = file
+        if not bundle.has_sheet(file):
+            images.request(file)
+
+    @property
+    def sheet(self):
+        """The image of the spritesheet, waiting for it if it is still loading."""
+        return images.get(self.file)
 
     def get_sprite(self, x, y, width, height):
         """Returns a single sprite of the spritesheet based on position.
+           Frames are shared through the frame cache, so the returned surface must not be modified.
 
         Args:
             x (int): The X axis of the spritesheet for the top left corner of a specific sprite.
@@ -27,12 +37,82 @@ class SpriteSheet:
         Returns:
             pygame.Surface: The specific sprite requested.
         """
+        return frame_cache.get((self.file, x, y, width, height),
+                               lambda: self.load_sprite(x, y, width, height))
+
+    def load_sprite(self, x, y, width, height):
+        """Takes a sprite from the asset bundle, or cuts it out of the spritesheet when it is not there.
+
+        Args:
+            x (int): The X axis of the spritesheet for the top left corner of a specific sprite.
+            y (int): The Y axis of the spritesheet for the top left corner of a specific sprite.
+            width (int): The width of the specific sprite.
+            height (int): The height of the specific sprite.
+
+        Returns:
+            pygame.Surface: The sprite.
+        """
+        sprite = bundle.frame((self.file, x, y, width, height))
+        if sprite is None:
+            sprite = self.cut_sprite(x, y, width, height)
+        return sprite
+
+    def cut_sprite(self, x, y, width, height):
+        """Cuts a new surface out of the spritesheet, bypassing the frame cache.
+
+        Args:
+            x (int): The X axis of the spritesheet for the top left corner of a specific sprite.
+            y (int): The Y axis of the spritesheet for the top left corner of a specific sprite.
+            width (int): The width of the specific sprite.
+            height (int): The height of the specific sprite.
+
+        Returns:
+            pygame.Surface: A new surface with the sprite.
+        """
         sprite = pygame.Surface([width, height])
         sprite.blit(self.sheet, (0, 0), (x, y, width, height))
         sprite.set_colorkey(BLACK)
         return sprite
 
 
+class SpritePool:
+    """Keeps the killed sprites of a class, to reuse them instead of creating new ones.
+       Sprites of the pool have a reset method taking the same arguments as their constructor, without the game,
+       and give themselves back with release when they are killed.
+    """
+
+    def __init__(self, game, sprite_class):
+        """Constructor of the pool. It starts empty.
+
+        Args:
+            game (game.Game): A reference for the Game class.
+            sprite_class (type): The class of the sprites, like Attack.
+        """
+        self.game = game
+        self.sprite_class = sprite_class
+        self.free = []
+
+    def get(self, *args):
+        """Returns a sprite of the pool reset with the arguments, or a new one if there is none left.
+
+        Returns:
+            pygame.sprite.Sprite: The sprite, already in its groups.
+        """
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            return sprite
+        return self.sprite_class(self.game, *args)
+
+    def release(self, sprite):
+        """Gives back a killed sprite, to be reused.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite.
+        """
+        self.free.append(sprite)
+
+
 class CameraGroup(pygame.sprite.Group):
     """Class responsible for the game camera logic. Inherits from pygame.sprite.Group."""
 
@@ -51,28 +131,123 @@ class CameraGroup(pygame.sprite.Group):
         self.half_w = self.display_surface.get_size()[0] // 2
         self.half_h = self.display_surface.get_size()[1] // 2
 
-    def center_target_camera(self, target):
+        # Statistics of the last custom_draw call.
+        self.drawn_count = 0
+        self.culled_count = 0
+
+        # What was drawn on the last frame, as (image, x, y) on the screen, and the camera offset, for the dirty render mode.
+        self.previous_frame = None
+        self.previous_offset = None
+
+    def center_target_camera(self, target, alpha=1.0):
         """Camera that puts the target sprite on the center of the screen and follows it.
 
         Args:
             target (pygame.sprite.Sprite): The sprite for the camera to follow.
+            alpha (float): How far the rendered frame is between the previous and the current update, from 0 to 1.
+        """
+        x, y = self.interpolated_position(target, alpha)
+        self.offset.x = x + target.rect.width // 2 - self.half_w
+        self.offset.y = y + target.rect.height // 2 - self.half_h
+
+    def interpolated_position(self, sprite, alpha):
+        """Returns the position where a sprite is drawn, between its position in the previous and in the current update.
+           Sprites that don't move have no previous_position and are drawn where they are.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite to draw.
+            alpha (float): How far the rendered frame is between the previous and the current update, from 0 to 1.
+
+        Returns:
+            tuple: The (x, y) world position of the sprite, rounded to whole pixels.
         """
-        self.offset.x = target.rect.centerx - self.half_w
-        self.offset.y = target.rect.centery - self.half_h
+        previous = getattr(sprite, 'previous_position', None)
+        if previous is None or alpha >= 1:
+            return sprite.rect.topleft
+        return (round(previous[0] + (sprite.rect.x - previous[0]) * alpha),
+                round(previous[1] + (sprite.rect.y - previous[1]) * alpha))
 
-    def custom_draw(self, player):
+    def custom_draw(self, player, alpha=1.0):
         """Draws every sprite of the game depending on the passed sprite position, creating the camera logic.
+           In the 'dirty' render mode, while the camera stays still, only the areas where something changed since the
+           last frame are drawn again.
 
         Args:
             player (pygame.sprite.Sprite): The sprite that the camera will follow. Should be a Player class.
+            alpha (float): How far the rendered frame is between the previous and the current update, from 0 to 1.
+
+        Returns:
+            list: The pygame.Rect of each area of the screen that changed, to pass to pygame.display.update.
         """
 
-        self.center_target_camera(player)
-        self.display_surface.fill(BLACK)
+        self.center_target_camera(player, alpha)
+        offset = (int(self.offset.x), int(self.offset.y))
+
+        # Only the sprites that intersect the screen are drawn, so the cost depends on the screen size, not the map size.
+        # The view is a bit larger, since moving sprites are drawn up to one step behind their rect.
+        margin = max(PLAYER_SPEED, ENEMY_SPEED)
+        view = pygame.Rect(offset, self.display_surface.get_size()).inflate(margin * 2, margin * 2)
+        visible = self.game.all_sprites.query(view)
+        total = len(self.game.all_sprites)
+        if self.game.enemy_engine == 'arrays':
+            # Enemies of the swarm are not sprites, so they are drawn after the other sprites of their layer.
+            layer_of = self.game.all_sprites.get_layer_of_sprite
+            split = next((i for i, sprite in enumerate(visible) if layer_of(sprite) > ENEMY_LAYER), len(visible))
+            visible[split:split] = self.game.enemies.visible(view)
+            total += len(self.game.enemies)
+
+        frame = []
+        for sprite in visible:
+            x, y = self.interpolated_position(sprite, alpha)
+            frame.append((sprite.image, x - offset[0], y - offset[1]))
+
+        dirty = None
+        if self.game.render_mode == 'dirty':
+            if offset == self.previous_offset:
+                dirty = self.dirty_rects(frame)
+            self.previous_frame = set(frame)
+            self.previous_offset = offset
+
+        if dirty is None:
+            # The camera moved, so everything on the screen changed.
+            self.display_surface.fill(BLACK)
+            self.display_surface.blits(((image, (x, y)) for image, x, y in frame), doreturn=False)
+            dirty = [self.display_surface.get_rect()]
+        else:
+            rects = [image.get_rect(topleft=(x, y)) for image, x, y in frame]
+            for rect in dirty:
+                self.display_surface.set_clip(rect)
+                self.display_surface.fill(BLACK)
+                for i in rect.collidelistall(rects):
+                    image, x, y = frame[i]
+                    self.display_surface.blit(image, (x, y))
+            self.display_surface.set_clip(None)
+
+        self.drawn_count = len(visible)
+        self.culled_count = total - self.drawn_count
+        return dirty
+
+    def dirty_rects(self, frame):
+        """Returns the areas of the screen that changed since the last frame, with the camera in the same place.
 
-        for sprite in self.game.all_sprites:
-            offset_pos = sprite.rect.topleft - self.offset
-            self.display_surface.blit(sprite.image, offset_pos)
+        Args:
+            frame (list): The (image, x, y) of each sprite drawn on this frame, in screen coordinates.
+
+        Returns:
+            list: The pygame.Rect of each changed area, or None if so much changed that drawing everything is cheaper.
+        """
+        screen = self.display_surface.get_rect()
+        dirty = []
+        area = 0
+        # A sprite that moved, changed its image, appeared or disappeared is in only one of the frames.
+        for image, x, y in self.previous_frame.symmetric_difference(frame):
+            rect = image.get_rect(topleft=(x, y)).clip(screen)
+            if rect:
+                dirty.append(rect)
+                area += rect.width * rect.height
+                if area > screen.width * screen.height:
+                    return None
+        return dirty
 
 
 class Player(pygame.sprite.Sprite):
@@ -91,8 +266,9 @@ class Player(pygame.sprite.Sprite):
         self.groups = self.game.all_sprites
         super().__init__(self.groups)
 
-        self.x = x * PLAYERSIZE
-        self.y = y * PLAYERSIZE
+        # World position, centered on the spawn tile.
+        self.x = x * TILESIZE + (TILESIZE - PLAYERSIZE) // 2
+        self.y = y * TILESIZE + (TILESIZE - PLAYERSIZE) // 2
         self.width = PLAYERSIZE
         self.height = PLAYERSIZE
 
@@ -102,10 +278,6 @@ class Player(pygame.sprite.Sprite):
         # TODO: Enum
         self.facing = 'down'
 
-        self.animation_loop = 1
-        self.idle_animation_change = 0.08
-        self.animation_change = 0.08
-
         self.image = self.game.character_spritesheet.get_sprite(
             0, 0, self.width, self.height)
 
@@ -114,122 +286,12 @@ class Player(pygame.sprite.Sprite):
         self.rect.x = self.x
         self.rect.y = self.y
 
-        # TODO: Must have a better way
-        self.down_animations = [
-            self.game.character_spritesheet.get_sprite(
-                0, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                64, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                128, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                192, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                256, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                320, 0, self.width, self.height)
-        ]
-
-        self.up_animations = [
-            self.game.character_spritesheet.get_sprite(
-                384, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                448, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                512, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                576, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                640, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                704, 0, self.width, self.height)
-        ]
-
-        self.right_animations = [
-            self.game.character_spritesheet.get_sprite(
-                768, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                832, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                896, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                960, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1024, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1088, 0, self.width, self.height)
-        ]
-
-        self.left_animations = [
-            self.game.character_spritesheet.get_sprite(
-                1152, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1216, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1280, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1344, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1408, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1472, 0, self.width, self.height)
-        ]
-
-        # Idle animations
-        self.idle_down_animations = [
-            self.game.character_spritesheet.get_sprite(
-                1536, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1600, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1664, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1728, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1792, 0, self.width, self.height)
-        ]
-
-        self.idle_up_animations = [
-            self.game.character_spritesheet.get_sprite(
-                1856, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1920, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                1984, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2048, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2112, 0, self.width, self.height)
-        ]
-
-        self.idle_right_animations = [
-            self.game.character_spritesheet.get_sprite(
-                2176, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2240, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2304, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2368, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2432, 0, self.width, self.height)
-        ]
-
-        self.idle_left_animations = [
-            self.game.character_spritesheet.get_sprite(
-                2496, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2560, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2624, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2688, 0, self.width, self.height),
-            self.game.character_spritesheet.get_sprite(
-                2752, 0, self.width, self.height)
-        ]
+        self.animation = self.game.animator.add(self, self.game.clips['player_idle_down'], 1)
 
     def update(self):
         """Updates the player sprite. Moves, animates and check collisions."""
+        # Kept to draw the player between the last two updates.
+        self.previous_position = self.rect.topleft
         self.movement()
         self.animate()
         self.collide_enemy()
@@ -239,36 +301,37 @@ class Player(pygame.sprite.Sprite):
         self.collide_blocks('x')
         self.rect.y += self.y_change
         self.collide_blocks('y')
+        reindex(self)
 
         self.x_change = 0
         self.y_change = 0
 
     def movement(self):
         """Method that makes the player movements."""
-        # List of all pressed keys
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
+        # Actions held down in this frame, from the keyboard or from a script.
+        keys = self.game.input_frame
+        if keys.is_held(LEFT):
             self.x_change -= PLAYER_SPEED
             self.facing = 'left'
-        if keys[pygame.K_RIGHT]:
+        if keys.is_held(RIGHT):
             self.x_change += PLAYER_SPEED
             self.facing = 'right'
-        if keys[pygame.K_UP]:
+        if keys.is_held(UP):
             self.y_change -= PLAYER_SPEED
             self.facing = 'up'
-        if keys[pygame.K_DOWN]:
+        if keys.is_held(DOWN):
             self.y_change += PLAYER_SPEED
             self.facing = 'down'
 
     def collide_interactables(self):
         """Tests if the player is in range of and interactable object."""
-        for i in self.game.interactables:
-            if self.rect.colliderect(i.rect):
-                self.game.is_in_range_of_interactable = True
-                self.game.interactable_in_range = i
-            else:
-                self.game.is_in_range_of_interactable = False
-                self.game.interactable_in_range = None
+        hits = self.game.interactables.query(self.rect)
+        if hits:
+            self.game.is_in_range_of_interactable = True
+            self.game.interactable_in_range = hits[0]
+        else:
+            self.game.is_in_range_of_interactable = False
+            self.game.interactable_in_range = None
 
     def collide_blocks(self, direction):
         """Checks for collisions with blocks.
@@ -279,40 +342,32 @@ class Player(pygame.sprite.Sprite):
         # TODO: ENUM
         if direction == "x":
             # Checks if a rect of a sprite is inside another rect
-            hits = pygame.sprite.spritecollide(self, self.game.blocks, False)
+            hits = self.game.tile_grid.hits(self.rect)
             if hits:
                 # If moving right
                 if self.x_change > 0:
                     # Lines the top left corner of the sprites and then moves it to the left width amount, rewriting the player's position.
-                    self.rect.x = hits[0].rect.left - self.rect.width
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.x += PLAYER_SPEED
+                    self.rect.x = hits[0].left - self.rect.width
                 # If moving left
                 if self.x_change < 0:
                     # Lines the top left corner of the sprites.
-                    self.rect.x = hits[0].rect.right
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.x -= PLAYER_SPEED
+                    self.rect.x = hits[0].right
         if direction == "y":
-            hits = pygame.sprite.spritecollide(self, self.game.blocks, False)
+            hits = self.game.tile_grid.hits(self.rect)
             if hits:
                 # If moving down
                 if self.y_change > 0:
                     # Lines the top left corner of the sprites and then moves it to the left width amount, rewriting the player's position.
-                    self.rect.y = hits[0].rect.top - self.rect.height
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.y += PLAYER_SPEED
+                    self.rect.y = hits[0].top - self.rect.height
                 # If moving left
                 if self.y_change < 0:
                     # Lines the top left corner of the sprites.
-                    self.rect.y = hits[0].rect.bottom
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.y -= PLAYER_SPEED
+                    self.rect.y = hits[0].bottom
 
     def collide_enemy(self):
         """Checks for collisions with enemies."""
         # TODO: Lose HP.
-        hits = pygame.sprite.spritecollide(self, self.game.enemies, False)
+        hits = self.game.enemies.query(self.rect)
         if hits:
             # Test if the enemy is already dead (playing death animation).
             if not hits[0].died:
@@ -320,175 +375,68 @@ class Player(pygame.sprite.Sprite):
                 self.game.playing = False
 
     def animate(self):
-        """Animates the player sprite."""
-        if self.facing == "down":
-            if self.y_change == 0:
-                self.image = self.idle_down_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.idle_animation_change
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-            else:
-                self.image = self.down_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.animation_change
-                if self.animation_loop >= 4:
-                    self.animation_loop = 1
-
-        if self.facing == "up":
-            if self.y_change == 0:
-                self.image = self.idle_up_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.idle_animation_change
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-            else:
-                self.image = self.up_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.animation_change
-                if self.animation_loop >= 4:
-                    self.animation_loop = 1
-
-        if self.facing == "left":
-            if self.x_change == 0:
-                self.image = self.idle_left_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.idle_animation_change
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-            else:
-                self.image = self.left_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.animation_change
-                if self.animation_loop >= 4:
-                    self.animation_loop = 1
-
-        if self.facing == "right":
-            if self.x_change == 0:
-                self.image = self.idle_right_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.idle_animation_change
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-            else:
-                self.image = self.right_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += self.animation_change
-                if self.animation_loop >= 4:
-                    self.animation_loop = 1
+        """Picks the walking or the idle clip of the facing. The frames are shown by the Animator."""
+        moving = self.y_change if self.facing in ('up', 'down') else self.x_change
+        self.animation.play(self.game.clips[f'player_{"walk" if moving else "idle"}_{self.facing}'])
 
 
 class Enemy(pygame.sprite.Sprite):
     def __init__(self, game, x, y):
         self.game = game
         self._layer = ENEMY_LAYER
-        self.groups = self.game.all_sprites, self.game.enemies
-        super().__init__(self.groups)
+        super().__init__()
 
-        self.x = x * TILESIZE
-        self.y = y * TILESIZE
         self.width = TILESIZE
         self.height = TILESIZE
 
+        self.image = self.game.enemy_spritesheet.get_sprite(
+            0, 0, self.width, self.height)
+        # self.image.set_colorkey(BLACK)
+
+        # Hitbox.
+        self.rect = self.image.get_rect()
+
+        self.dead_sound = sounds.get(ENEMY_DEAD_SOUND)
+
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        """Starts the life of the enemy on a tile and adds it to the groups, either new or taken from a SpritePool.
+
+        Args:
+            x (int): The column of the tile.
+            y (int): The row of the tile.
+        """
+        self.x = x * TILESIZE
+        self.y = y * TILESIZE
+
         self.x_change = 0
         self.y_change = 0
 
-        self.facing = random.choice(['up', 'down'])
-        self.animation_loop = 1
+        self.facing = self.game.rng.choice(['up', 'down'])
         self.movement_loop = 0
-        self.max_travel = random.randint(7, 30)
+        self.max_travel = self.game.rng.randint(7, 30)
 
-        self.image = self.game.enemy_spritesheet.get_sprite(
-            3, 2, self.width, self.height)
-        # self.image.set_colorkey(BLACK)
         self.died = False
+        self.played_dead_sound = False
 
-        # Hitbox.
-        self.rect = self.image.get_rect()
         self.rect.x = self.x
         self.rect.y = self.y
+        self.previous_position = None
 
-        self.played_dead_sound = False
-        self.dead_sound = pygame.mixer.Sound("./sounds/vampire_dead.mp3")
-
-        self.down_animations = [
-            self.game.enemy_spritesheet.get_sprite(
-                0, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                96, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                192, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                288, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                384, 0, self.width, self.height)
-        ]
-
-        self.up_animations = [
-            self.game.enemy_spritesheet.get_sprite(
-                480, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                576, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                672, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                768, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                864, 0, self.width, self.height)
-        ]
-
-        self.right_animations = [
-            self.game.enemy_spritesheet.get_sprite(
-                960, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1056, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1152, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1248, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1344, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1440, 0, self.width, self.height)
-        ]
-
-        self.left_animations = [
-            self.game.enemy_spritesheet.get_sprite(
-                1536, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1632, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1728, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1824, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                1920, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2016, 0, self.width, self.height)
-        ]
-
-        self.die_animations = [
-            self.game.enemy_spritesheet.get_sprite(
-                2112, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2208, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2304, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2400, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2496, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2592, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2688, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2784, 0, self.width, self.height),
-            self.game.enemy_spritesheet.get_sprite(
-                2880, 0, self.width, self.height),
-        ]
+        self.add(self.game.all_sprites, self.game.enemies)
+        self.animation = self.game.animator.add(self, self.game.clips[f'enemy_walk_{self.facing}'], 1)
+
+    def kill(self):
+        """Removes the enemy from every group and gives it back to the pool, to be reused by the next level."""
+        if self.alive():
+            super().kill()
+            # The animation of the previous life must not go on when the sprite is reused.
+            self.animation.stop()
+            self.game.enemy_pool.release(self)
 
     def update(self):
+        self.previous_position = self.rect.topleft
         if not self.died:
             self.movement()
             self.animate()
@@ -496,6 +444,7 @@ class Enemy(pygame.sprite.Sprite):
             self.collide_blocks('x')
             self.rect.y += self.y_change
             self.collide_blocks('y')
+            reindex(self)
             self.x_change = 0
             self.y_change = 0
         else:
@@ -506,81 +455,75 @@ class Enemy(pygame.sprite.Sprite):
             self.animate()
 
     def movement(self):
+        if self.game.flow_field is not None and self.chase():
+            return
+
         if self.facing == 'up':
             self.y_change -= ENEMY_SPEED
             self.movement_loop -= 1
             if self.movement_loop <= -self.max_travel:
-                self.facing = random.choice(['down', 'right', 'left'])
+                self.facing = self.game.rng.choice(['down', 'right', 'left'])
 
         if self.facing == 'down':
             self.y_change += ENEMY_SPEED
             self.movement_loop += 1
             if self.movement_loop >= self.max_travel:
-                self.facing = random.choice(['up', 'right', 'left'])
+                self.facing = self.game.rng.choice(['up', 'right', 'left'])
 
         if self.facing == 'right':
             self.x_change += ENEMY_SPEED
             self.movement_loop -= 1
             if self.movement_loop <= -self.max_travel:
-                self.facing = random.choice(['down', 'up', 'left'])
+                self.facing = self.game.rng.choice(['down', 'up', 'left'])
 
         if self.facing == 'left':
             self.x_change -= ENEMY_SPEED
             self.movement_loop -= 1
             if self.movement_loop <= -self.max_travel:
-                self.facing = random.choice(['down', 'up', 'right'])
+                self.facing = self.game.rng.choice(['down', 'up', 'right'])
+
+    def chase(self):
+        """Steps toward the player, following the flow field from the tile of the enemy center.
+           The enemy first lines up with its tile across the direction it goes, so it never cuts the corner of a wall.
+
+        Returns:
+            bool: False if the tile is out of the reach of the flow field, so the enemy wanders instead.
+        """
+        column = self.rect.centerx // TILESIZE
+        row = self.rect.centery // TILESIZE
+        direction = self.game.flow_field.direction((column, row))
+        if direction == UNREACHED:
+            return False
+
+        # On the tile of the player, the enemy only lines up with it.
+        name = DIRECTIONS[direction] if direction != TARGET else None
+        offset_x = column * TILESIZE - self.rect.x
+        offset_y = row * TILESIZE - self.rect.y
+        if offset_x and name in ('down', 'up', None):
+            self.x_change = max(-ENEMY_SPEED, min(offset_x, ENEMY_SPEED))
+            self.facing = 'right' if offset_x > 0 else 'left'
+        elif offset_y and name in ('right', 'left', None):
+            self.y_change = max(-ENEMY_SPEED, min(offset_y, ENEMY_SPEED))
+            self.facing = 'down' if offset_y > 0 else 'up'
+        elif name is not None:
+            step_x, step_y = STEPS[direction]
+            self.x_change = step_x * ENEMY_SPEED
+            self.y_change = step_y * ENEMY_SPEED
+            self.facing = name
+        return True
+
+    def death_ending(self):
+        """Tests if the death clip of the enemy ends on this update, so the Animator kills it."""
+        clip = self.animation.clip
+        return self.died and clip.on_end == 'kill' and self.animation.position + clip.rate >= clip.end
 
     def animate(self):
-        if self.facing == "down":
-            if self.y_change == 0:
-                self.image = self.game.enemy_spritesheet.get_sprite(
-                    0, 0, self.width, self.height)
-            else:
-                self.image = self.down_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += 0.1
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-
-        if self.facing == "up":
-            if self.y_change == 0:
-                self.image = self.game.enemy_spritesheet.get_sprite(
-                    480, 0, self.width, self.height)
-            else:
-                self.image = self.up_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += 0.1
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-
-        if self.facing == "right":
-            if self.x_change == 0:
-                self.image = self.game.enemy_spritesheet.get_sprite(
-                    960, 0, self.width, self.height)
-            else:
-                self.image = self.right_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += 0.1
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-
-        if self.facing == "left":
-            if self.x_change == 0:
-                self.image = self.game.enemy_spritesheet.get_sprite(
-                    1536, 0, self.width, self.height)
-            else:
-                self.image = self.left_animations[math.floor(
-                    self.animation_loop)]
-                self.animation_loop += 0.1
-                if self.animation_loop >= 5:
-                    self.animation_loop = 1
-
-        if self.facing == "death":
-            self.image = self.die_animations[math.floor(self.animation_loop)]
-            self.animation_loop += 0.1
-            if self.animation_loop >= 9:
-                self.animation_loop = 1
-                self.kill()
+        """Picks the clip of the facing: walking, still when the enemy did not move, or dying."""
+        if self.facing == 'death':
+            self.animation.play(self.game.clips['enemy_death'])
+        else:
+            moving = self.y_change if self.facing in ('up', 'down') else self.x_change
+            self.animation.play(self.game.clips[f'enemy_{"walk" if moving else "still"}_{self.facing}'])
 
     def collide_blocks(self, direction):
         """Checks for collisions with blocks.
@@ -591,63 +534,80 @@ class Enemy(pygame.sprite.Sprite):
         # TODO: ENUM
         if direction == "x":
             # Checks if a rect of a sprite is inside another rect
-            hits = pygame.sprite.spritecollide(self, self.game.blocks, False)
+            hits = self.game.tile_grid.hits(self.rect)
             if hits:
                 # If moving right
                 if self.x_change > 0:
                     # Lines the top left corner of the sprites and then moves it to the left width amount, rewriting the player's position.
-                    self.rect.x = hits[0].rect.left - self.rect.width
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.x += ENEMY_SPEED
+                    self.rect.x = hits[0].left - self.rect.width
                 # If moving left
                 if self.x_change < 0:
                     # Lines the top left corner of the sprites.
-                    self.rect.x = hits[0].rect.right
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.x -= ENEMY_SPEED
+                    self.rect.x = hits[0].right
         if direction == "y":
-            hits = pygame.sprite.spritecollide(self, self.game.blocks, False)
+            hits = self.game.tile_grid.hits(self.rect)
             if hits:
                 # If moving down
                 if self.y_change > 0:
                     # Lines the top left corner of the sprites and then moves it to the left width amount, rewriting the player's position.
-                    self.rect.y = hits[0].rect.top - self.rect.height
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.y += ENEMY_SPEED
+                    self.rect.y = hits[0].top - self.rect.height
                 # If moving left
                 if self.y_change < 0:
                     # Lines the top left corner of the sprites.
-                    self.rect.y = hits[0].rect.bottom
-                    for sprite in self.game.all_sprites:
-                        sprite.rect.y -= ENEMY_SPEED
+                    self.rect.y = hits[0].bottom
+
+
+def wall_image(game, rng):
+    """Picks the image of a wall tile, plain most of the time, or one of the two details.
+
+    Args:
+        game (game.Game): A reference for the Game class.
+        rng (random.Random): The random generator of the tile decorations.
+
+    Returns:
+        pygame.Surface: The shared frame of the wall.
+    """
+    index = rng.randint(0, 100)
+    if index < 90:
+        return game.wall_spritesheet.get_sprite(0, 0, TILESIZE, TILESIZE)
+    elif index >= 90 and index <= 95:
+        return game.wall_spritesheet_detail1.get_sprite(0, 0, TILESIZE, TILESIZE)
+    else:
+        return game.wall_spritesheet_detail2.get_sprite(0, 0, TILESIZE, TILESIZE)
+
+
+def floor_image(level, rng):
+    """Picks the image of a floor tile of a level, plain most of the time, or the detail.
+
+    Args:
+        level (level.Level): The level, which has the floor spritesheets of its depth.
+        rng (random.Random): The random generator of the tile decorations.
+
+    Returns:
+        pygame.Surface: The shared frame of the floor.
+    """
+    index = rng.randint(0, 100)
+    if index < 97:
+        return level.floor_spritesheet.get_sprite(0, 0, TILESIZE, TILESIZE)
+    else:
+        return level.floor_detail_spritesheet.get_sprite(0, 0, TILESIZE, TILESIZE)
 
 
 class Block(pygame.sprite.Sprite):
 
-    def __init__(self, game, x, y):
-        self.game = game
+    def __init__(self, level, x, y, rng):
+        self.level = level
+        self.game = level.game
         self._layer = BLOCK_LAYER
-        self.groups = self.game.all_sprites, self.game.blocks
-        super().__init__(self.groups)
+        # Walls are drawn from the baked LevelChunk surfaces and collide through the TileGrid, so they join no group.
+        super().__init__()
 
         self.x = x * TILESIZE
         self.y = y * TILESIZE
         self.width = TILESIZE
         self.height = TILESIZE
 
-        self.image = self.game.wall_spritesheet.get_sprite(
-            0, 0, self.width, self.height)
-
-        index = random.randint(0, 100)
-        if index < 90:
-            self.image = self.game.wall_spritesheet.get_sprite(
-                0, 0, self.width, self.height)
-        elif index >= 90 and index <= 95:
-            self.image = self.game.wall_spritesheet_detail1.get_sprite(
-                0, 0, self.width, self.height)
-        else:
-            self.image = self.game.wall_spritesheet_detail2.get_sprite(
-                0, 0, self.width, self.height)
+        self.image = wall_image(self.game, rng)
 
         # Hitbox.
         self.rect = self.image.get_rect()
@@ -659,7 +619,8 @@ class Stair(pygame.sprite.Sprite):
     def __init__(self, game, x, y):
         self.game = game
         self._layer = GROUND_LAYER
-        self.groups = self.game.all_sprites, self.game.interactables
+        # The stair image is baked into a LevelChunk, the sprite is only kept for interactions.
+        self.groups = self.game.interactables
         super().__init__(self.groups)
 
         self.x = x * TILESIZE
@@ -678,27 +639,19 @@ class Stair(pygame.sprite.Sprite):
 
 class Ground(pygame.sprite.Sprite):
 
-    def __init__(self, game, x, y):
-        self.game = game
+    def __init__(self, level, x, y, rng):
+        self.level = level
+        self.game = level.game
         self._layer = GROUND_LAYER
-        self.groups = self.game.all_sprites
-        super().__init__(self.groups)
+        # Floor tiles never change, so they are only baked into LevelChunk surfaces and join no group.
+        super().__init__()
 
         self.x = x * TILESIZE
         self.y = y * TILESIZE
         self.width = TILESIZE
         self.height = TILESIZE
 
-        # self.image = self.game.floor_spritesheet.get_sprite(
-        #     0, 0, self.width, self.height)
-
-        index = random.randint(0, 100)
-        if index < 97:
-            self.image = self.game.floor_spritesheet.get_sprite(
-                0, 0, self.width, self.height)
-        else:
-            self.image = self.game.floor_detail_spritesheet.get_sprite(
-                0, 0, self.width, self.height)
+        self.image = floor_image(self.level, rng)
 
         # Hitbox.
         self.rect = self.image.get_rect()
@@ -706,9 +659,34 @@ class Ground(pygame.sprite.Sprite):
         self.rect.y = self.y
 
 
+class LevelChunk(pygame.sprite.Sprite):
+    """A square of CHUNK_SIZE x CHUNK_SIZE static tiles (floor, walls and stairs) pre-rendered into a single surface."""
+
+    def __init__(self, game, x, y, image):
+        """Constructor for the level chunk.
+
+        Args:
+            game (game.Game): A reference for the Game class.
+            x (int): The chunk column in the map.
+            y (int): The chunk row in the map.
+            image (pygame.Surface): The baked tiles of the chunk.
+        """
+        self.game = game
+        self._layer = GROUND_LAYER
+        self.groups = self.game.all_sprites
+        super().__init__(self.groups)
+
+        self.image = image
+
+        # Hitbox.
+        self.rect = self.image.get_rect()
+        self.rect.x = x * CHUNK_SIZE * TILESIZE
+        self.rect.y = y * CHUNK_SIZE * TILESIZE
+
+
 class Button:
     def __init__(self, x, y, width, height, fg, bg, content, fontsize):
-        self.font = pygame.font.Font('fonts/times_new_roman.ttf', fontsize)
+        # The text comes from the text cache, so rebuilding a button never reads the font file again.
         self.content = content
 
         self.x = x
@@ -726,7 +704,7 @@ class Button:
         self.rect.x = self.x
         self.rect.y = self.y
 
-        self.text = self.font.render(self.content, True, self.fg)
+        self.text = texts.render(self.content, self.fg, fontsize)
         self.text_rect = self.text.get_rect(
             center=(self.width/2, self.height/2))
         self.image.blit(self.text, self.text_rect)
@@ -745,130 +723,56 @@ class Attack(pygame.sprite.Sprite):
         self.game = game
 
         self._layer = PLAYER_LAYER
-        self.groups = self.game.all_sprites, self.game.attacks
-        super().__init__(self.groups)
+        super().__init__()
 
-        self.x = x
-        self.y = y
         self.width = PLAYERSIZE
         self.height = PLAYERSIZE
 
-        self.animation_loop = 0
-        self.animation_change = 0.2
-
         self.image = self.game.attack_spritesheet.get_sprite(
             0, 0, self.width, self.height)
         self.rect = self.image.get_rect()
+
+        self.sword_sound = sounds.get(SWORD_SOUND)
+
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        """Starts the attack at a position and adds it to the groups, either new or taken from a SpritePool.
+
+        Args:
+            x (int): The X axis of the top left corner, in pixels.
+            y (int): The Y axis of the top left corner, in pixels.
+        """
+        self.x = x
+        self.y = y
         self.rect.x = self.x
         self.rect.y = self.y
 
-        self.sword_sound = pygame.mixer.Sound("./sounds/sword.mp3")
-
-        self.down_animations = [
-            self.game.attack_spritesheet.get_sprite(
-                0, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                64, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                128, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                192, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                256, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                320, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                384, 0, self.width, self.height)
-        ]
-
-        self.up_animations = [
-            self.game.attack_spritesheet.get_sprite(
-                448, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                512, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                576, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                640, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                704, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                768, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                832, 0, self.width, self.height)
-        ]
-
-        self.left_animations = [
-            self.game.attack_spritesheet.get_sprite(
-                896, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                960, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1024, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1088, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1152, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1216, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1280, 0, self.width, self.height)
-        ]
-
-        self.right_animations = [
-            self.game.attack_spritesheet.get_sprite(
-                1344, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1408, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1472, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1536, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1600, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1664, 0, self.width, self.height),
-            self.game.attack_spritesheet.get_sprite(
-                1728, 0, self.width, self.height)
-        ]
+        self.add(self.game.all_sprites, self.game.attacks)
+        self.animation = self.game.animator.add(self, self.game.clips['attack_down'])
+
+    def kill(self):
+        """Removes the attack from every group and gives it back to the pool, for the next attack."""
+        if self.alive():
+            super().kill()
+            self.animation.stop()
+            self.game.attack_pool.release(self)
 
     def update(self):
         self.animate()
         self.collide()
 
     def collide(self):
-        hits = pygame.sprite.spritecollide(self, self.game.enemies, False)
+        # A dying enemy still takes the hit, so an attack never kills the enemy behind it. Enemies whose death clip
+        # ends on this update are left out, as they used to be killed by their own update before the attacks.
+        hits = [enemy for enemy in self.game.enemies.query(self.rect) if not enemy.death_ending()]
         if hits:
             enemy_died = hits[0]
             enemy_died.died = True
 
     def animate(self):
-        direction = self.game.player.facing
-        if direction == 'up':
-            self.image = self.up_animations[math.floor(self.animation_loop)]
-            self.animation_loop += self.animation_change
-            if self.animation_loop >= 7:
-                self.kill()
-            if self.animation_loop == 1:
-                pygame.mixer.Sound.play(self.sword_sound)
-        if direction == 'down':
-            self.image = self.down_animations[math.floor(self.animation_loop)]
-            self.animation_loop += self.animation_change
-            if self.animation_loop >= 7:
-                self.kill()
-            if self.animation_loop == 1:
-                pygame.mixer.Sound.play(self.sword_sound)
-        if direction == 'left':
-            self.image = self.left_animations[math.floor(self.animation_loop)]
-            self.animation_loop += self.animation_change
-            if self.animation_loop >= 7:
-                self.kill()
-            if self.animation_loop == 1:
-                pygame.mixer.Sound.play(self.sword_sound)
-        if direction == 'right':
-            self.image = self.right_animations[math.floor(self.animation_loop)]
-            self.animation_loop += self.animation_change
-            if self.animation_loop >= 7:
-                self.kill()
-            if self.animation_loop == 1:
-                pygame.mixer.Sound.play(self.sword_sound)
+        """Picks the clip of the direction the player faces. The Animator kills the attack at the end of it."""
+        self.animation.play(self.game.clips['attack_' + self.game.player.facing])
+
+    def play_sound(self):
+        pygame.mixer.Sound.play(self.sword_sound)
@@ -0,0 +1,366 @@
+"""Array-backed enemies, for levels with far more enemies than individual sprites can handle."""
+import numpy as np
+import pygame
+
+from config import *
+from assets import sounds
+from pathfinding import UNREACHED, TARGET
+
+# Facings, as indexes of the movement and animation tables.
+DOWN = 0
+UP = 1
+RIGHT = 2
+LEFT = 3
+
+# Movement of each facing, in pixels per update.
+MOVE_X = np.array([0, 0, ENEMY_SPEED, -ENEMY_SPEED], dtype=np.int32)
+MOVE_Y = np.array([ENEMY_SPEED, -ENEMY_SPEED, 0, 0], dtype=np.int32)
+# movement_loop goes up while walking down and down for every other facing, like Enemy.movement.
+LOOP_STEP = np.array([1, -1, -1, -1], dtype=np.int32)
+
+FACING_NAMES = ['down', 'up', 'right', 'left']
+
+
+class EnemyHandle:
+    """One enemy of a swarm, as returned by EnemySwarm.query. Only valid until the next swarm update."""
+
+    def __init__(self, swarm, index):
+        """Constructor of the enemy handle.
+
+        Args:
+            swarm (EnemySwarm): The swarm of the enemy.
+            index (int): The index of the enemy in the swarm arrays.
+        """
+        self.swarm = swarm
+        self.index = index
+
+    @property
+    def rect(self):
+        return pygame.Rect(int(self.swarm.x[self.index]), int(self.swarm.y[self.index]), TILESIZE, TILESIZE)
+
+    @property
+    def died(self):
+        return bool(self.swarm.dying[self.index])
+
+    @died.setter
+    def died(self, value):
+        if value:
+            self.swarm.dying[self.index] = True
+
+    def death_ending(self):
+        """Like Enemy.death_ending. The swarm removes the enemies that finished dying in its own update."""
+        return False
+
+
+class EnemyView:
+    """What custom_draw needs to draw an enemy of a swarm: its image, rect and previous position."""
+
+    def __init__(self):
+        self.image = None
+        self.rect = pygame.Rect(0, 0, TILESIZE, TILESIZE)
+        self.previous_position = (0, 0)
+
+
+class EnemySwarm:
+    """Every enemy of a level, kept in NumPy arrays and updated together.
+
+    Behaves like the Enemy sprites: enemies walk up and down, turning to a random side after max_travel steps,
+    stop at the walls and play their death animation when an attack hits them. There are no sprites, so the
+    cost of an update barely grows with the enemy count, and only the enemies on the screen are turned into
+    EnemyView objects for drawing. Query, len and empty work like on the enemies group, so the player and
+    the attacks handle both engines the same way.
+    """
+
+    def __init__(self, game):
+        """Constructor of the swarm. It starts empty, see spawn.
+
+        Args:
+            game (game.Game): A reference for the Game class.
+        """
+        self.game = game
+        self.rng = np.random.default_rng(0)
+        # Same clips as the Enemy sprites. Every walking clip has the same timing.
+        self.walk_clips = [game.clips['enemy_walk_' + name] for name in FACING_NAMES]
+        self.death_clip = game.clips['enemy_death']
+        self.dead_sound = sounds.get(ENEMY_DEAD_SOUND)
+        self.views = []
+        # Cells of the spatial grid, sorted again on the first query after the enemies move, see index.
+        self.cells = None
+        self.order = None
+        self.spawn([])
+
+    def spawn(self, tiles):
+        """Replaces the enemies of the swarm.
+
+        Args:
+            tiles (list): The (column, row) tile of each enemy.
+        """
+        tiles = np.array(tiles, dtype=np.int32).reshape(-1, 2)
+        count = len(tiles)
+        if count:
+            # Enemies choose their moves with their own generator, seeded from the game one.
+            self.rng = np.random.default_rng(self.game.rng.getrandbits(64))
+
+        self.x = tiles[:, 0] * TILESIZE
+        self.y = tiles[:, 1] * TILESIZE
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+        self.facing = self.rng.choice(np.array([UP, DOWN], dtype=np.int8), size=count)
+        self.movement_loop = np.zeros(count, dtype=np.int32)
+        self.max_travel = self.rng.integers(7, 31, size=count, dtype=np.int32)
+        self.animation_loop = np.ones(count)
+        self.dying = np.zeros(count, dtype=bool)
+        self.played_dead_sound = np.zeros(count, dtype=bool)
+        self.frame = np.zeros(count, dtype=np.int8)
+
+        if count:
+            # Walls indexed along the axis of movement first, with a border of floor, so positions out of the
+            # map never hit anything, like in TileGrid.hits.
+            mask = self.game.tile_grid.mask
+            self.walls_x = np.ascontiguousarray(np.pad(mask.T, 1))
+            self.walls_y = np.ascontiguousarray(np.pad(mask, 1))
+            self.columns = -(-mask.shape[1] * TILESIZE // SPATIAL_CELL_SIZE)
+            self.rows = -(-mask.shape[0] * TILESIZE // SPATIAL_CELL_SIZE)
+        self.cells = None
+        self.order = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def empty(self):
+        """Removes every enemy."""
+        self.spawn([])
+
+    def update(self):
+        """Moves, animates and kills every enemy, once per update."""
+        if not len(self):
+            return
+        self.previous_x[:] = self.x
+        self.previous_y[:] = self.y
+        walking = ~self.dying
+        if self.game.flow_field is not None:
+            chasing, chase_x, chase_y = self.chase(walking)
+            wandering = walking & ~chasing
+        else:
+            wandering = walking
+
+        # Walks, and turns to one of the other three facings at the end of the travel.
+        facing = self.facing
+        change_x = np.where(wandering, MOVE_X[facing], 0)
+        change_y = np.where(wandering, MOVE_Y[facing], 0)
+        self.movement_loop += np.where(wandering, LOOP_STEP[facing], 0)
+        turn = wandering & np.where(facing == DOWN,
+                                    self.movement_loop >= self.max_travel,
+                                    self.movement_loop <= -self.max_travel)
+        if turn.any():
+            facing[turn] = (facing[turn] + self.rng.integers(1, 4, size=np.count_nonzero(turn))) % 4
+        if self.game.flow_field is not None:
+            change_x += chase_x
+            change_y += chase_y
+
+        # Enemies that do not move along their facing, like when they just turned, show the first frame of their
+        # walk without advancing, like the still clips of the Enemy sprites.
+        vertical = (facing == DOWN) | (facing == UP)
+        still = walking & (np.where(vertical, change_y, change_x) == 0)
+
+        # The frame is picked before the animation advances, like in Animator.advance.
+        walk = self.walk_clips[0]
+        self.frame[:] = np.where(still, 0, self.animation_loop)
+        self.animation_loop += np.where(walking, np.where(still, 0, walk.rate), self.death_clip.rate)
+        self.animation_loop[walking & (self.animation_loop >= walk.end)] = walk.loop_to
+
+        self.x += change_x
+        self.collide_walls(self.x, self.y, change_x, self.walls_x)
+        self.y += change_y
+        self.collide_walls(self.y, self.x, change_y, self.walls_y)
+        self.cells = None
+
+        # Every enemy that died plays the death sound, like the Enemy sprites.
+        new_deaths = self.dying & ~self.played_dead_sound
+        for _ in range(np.count_nonzero(new_deaths)):
+            pygame.mixer.Sound.play(self.dead_sound)
+        self.played_dead_sound |= new_deaths
+
+        finished = self.dying & (self.animation_loop >= self.death_clip.end)
+        if finished.any():
+            self.remove(~finished)
+
+    def chase(self, walking):
+        """Steps the enemies toward the player, following the flow field from the tile of their center, like
+           Enemy.chase. The field directions are in the order of the facings, so they are used as facings.
+
+        Args:
+            walking (numpy.ndarray): Which enemies are not dying.
+
+        Returns:
+            tuple: Which enemies are chasing, and the x and y change of each enemy.
+        """
+        directions = self.game.flow_field.directions
+        column = np.clip((self.x + TILESIZE // 2) // TILESIZE, 0, directions.shape[1] - 1)
+        row = np.clip((self.y + TILESIZE // 2) // TILESIZE, 0, directions.shape[0] - 1)
+        direction = directions[row, column]
+        chasing = walking & (direction != UNREACHED)
+
+        # Lines up with the tile across the direction first, or on both axes on the tile of the player.
+        offset_x = column * TILESIZE - self.x
+        offset_y = row * TILESIZE - self.y
+        vertical = (direction == DOWN) | (direction == UP)
+        target = direction == TARGET
+        align_x = chasing & (vertical | target) & (offset_x != 0)
+        align_y = chasing & ~align_x & ~vertical & (offset_y != 0)
+        step = chasing & ~align_x & ~align_y & ~target
+
+        change_x = np.zeros(len(self), dtype=np.int32)
+        change_y = np.zeros(len(self), dtype=np.int32)
+        change_x[align_x] = np.clip(offset_x[align_x], -ENEMY_SPEED, ENEMY_SPEED)
+        change_y[align_y] = np.clip(offset_y[align_y], -ENEMY_SPEED, ENEMY_SPEED)
+        change_x[step] = MOVE_X[direction[step]]
+        change_y[step] = MOVE_Y[direction[step]]
+
+        self.facing[align_x] = np.where(change_x[align_x] > 0, RIGHT, LEFT)
+        self.facing[align_y] = np.where(change_y[align_y] > 0, DOWN, UP)
+        self.facing[step] = direction[step]
+        return chasing, change_x, change_y
+
+    def collide_walls(self, position, cross, change, walls):
+        """Pushes the enemies that walked into a wall back to its side, along one axis.
+
+        Args:
+            position (numpy.ndarray): The position of each enemy on the axis of movement, changed in place.
+            cross (numpy.ndarray): The position of each enemy on the other axis.
+            change (numpy.ndarray): How much each enemy moved on the axis of movement.
+            walls (numpy.ndarray): The wall matrix indexed by the axis of movement, then the other axis, with a border.
+        """
+        # Only the enemies that moved on this axis can have walked into a wall.
+        moved = np.flatnonzero(change)
+        if not len(moved):
+            return
+        moved_position = position[moved]
+        moved_cross = cross[moved]
+        lines, columns = walls.shape
+        walls = walls.ravel()
+
+        # An enemy is one tile big, so it overlaps at most two tiles on each axis.
+        first = np.clip(moved_position // TILESIZE + 1, 0, lines - 1)
+        last = np.clip((moved_position + TILESIZE - 1) // TILESIZE + 1, 0, lines - 1)
+        cross_first = np.clip(moved_cross // TILESIZE + 1, 0, columns - 1)
+        cross_last = np.clip((moved_cross + TILESIZE - 1) // TILESIZE + 1, 0, columns - 1)
+        first_hit = walls[first * columns + cross_first] | walls[first * columns + cross_last]
+        last_hit = walls[last * columns + cross_first] | walls[last * columns + cross_last]
+        hit = np.flatnonzero(first_hit | last_hit)
+        if not len(hit):
+            return
+
+        # Moving forward, lines up with the nearest wall ahead, moving back, with the nearest wall behind.
+        # The indexes of the walls are one more than their tile, because of the border.
+        forward = change[moved[hit]] > 0
+        ahead = np.where(first_hit[hit], first[hit], last[hit]) - 1
+        behind = np.where(last_hit[hit], last[hit], first[hit]) - 1
+        position[moved[hit]] = np.where(forward, ahead * TILESIZE - TILESIZE, (behind + 1) * TILESIZE)
+
+    def remove(self, keep):
+        """Removes enemies from the swarm.
+
+        Args:
+            keep (numpy.ndarray): True for each enemy that stays.
+        """
+        for name in ('x', 'y', 'previous_x', 'previous_y', 'facing', 'movement_loop', 'max_travel',
+                     'animation_loop', 'dying', 'played_dead_sound', 'frame'):
+            setattr(self, name, getattr(self, name)[keep])
+        self.cells = None
+        self.order = None
+
+    def index(self):
+        """Buckets the enemies into the cells of the spatial grid of the sprite engine, SPATIAL_CELL_SIZE wide.
+
+        Returns:
+            tuple: The indexes of the enemies sorted by the cell of their top left corner, and the cell of each.
+        """
+        if self.cells is None:
+            cells = self.cell_keys(self.x // SPATIAL_CELL_SIZE, self.y // SPATIAL_CELL_SIZE)
+            # Enemies rarely change cells in an update, so the previous order is almost sorted,
+            # and sorting it again is much faster than sorting from scratch.
+            order = self.order if self.order is not None else np.arange(len(self))
+            self.order = order[np.argsort(cells[order], kind='stable')]
+            self.cells = (self.order, cells[self.order])
+        return self.cells
+
+    def cell_keys(self, column, row):
+        """Returns the key of cells, row by row. Cells out of the map are clipped to its border.
+
+        Args:
+            column (numpy.ndarray): The column of each cell.
+            row (numpy.ndarray): The row of each cell.
+
+        Returns:
+            numpy.ndarray: The key of each cell.
+        """
+        row = np.minimum(np.maximum(row, 0), self.rows - 1)
+        column = np.minimum(np.maximum(column, 0), self.columns - 1)
+        return row * self.columns + column
+
+    def overlapping(self, rect):
+        """Returns the indexes of the enemies whose rect intersects a rect.
+           Only the enemies of the cells around the rect are tested, like in SpatialHash.query_rect.
+
+        Args:
+            rect (pygame.Rect): The area to search.
+
+        Returns:
+            numpy.ndarray: The indexes of the enemies, in spawn order.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.intp)
+        order, cells = self.index()
+        # An enemy is at most a cell big, so the ones overlapping the rect have their top left corner
+        # in the cells of the rect, or in the cells just before them.
+        # The cells are clipped to the map like in cell_keys, with Python numbers, as there are only a few.
+        size = SPATIAL_CELL_SIZE
+        first_column = min(max(rect.left // size - 1, 0), self.columns - 1)
+        last_column = min(max((rect.right - 1) // size, 0), self.columns - 1)
+        first_row = min(max(rect.top // size - 1, 0), self.rows - 1)
+        last_row = min(max((rect.bottom - 1) // size, 0), self.rows - 1)
+        # Keys of the same type as the cells, or searchsorted converts every cell on each call.
+        rows = np.arange(first_row * self.columns, last_row * self.columns + 1, self.columns, dtype=cells.dtype)
+        # The cells of a row are next to each other in the sorted keys.
+        starts = cells.searchsorted(rows + first_column, side='left').tolist()
+        ends = cells.searchsorted(rows + last_column, side='right').tolist()
+        candidates = np.concatenate([order[start:end] for start, end in zip(starts, ends)])
+        x = self.x[candidates]
+        y = self.y[candidates]
+        inside = (x < rect.right) & (x + TILESIZE > rect.left) & (y < rect.bottom) & (y + TILESIZE > rect.top)
+        return np.sort(candidates[inside])
+
+    def query(self, rect):
+        """Returns the enemies that intersect a rect, like SpatialGroup.query.
+
+        Args:
+            rect (pygame.Rect): The area to search.
+
+        Returns:
+            list: The EnemyHandle of each enemy inside the area.
+        """
+        return [EnemyHandle(self, index) for index in self.overlapping(rect).tolist()]
+
+    def visible(self, view):
+        """Returns the enemies to draw inside a rect. The views are reused by the next call.
+
+        Args:
+            view (pygame.Rect): The area on the screen, in world coordinates.
+
+        Returns:
+            list: The EnemyView of each enemy inside the area, in spawn order.
+        """
+        indexes = self.overlapping(view)
+        while len(self.views) < len(indexes):
+            self.views.append(EnemyView())
+
+        views = self.views[:len(indexes)]
+        rows = zip(views, self.x[indexes].tolist(), self.y[indexes].tolist(),
+                   self.previous_x[indexes].tolist(), self.previous_y[indexes].tolist(),
+                   self.facing[indexes].tolist(), self.dying[indexes].tolist(), self.frame[indexes].tolist())
+        for enemy, x, y, previous_x, previous_y, facing, dying, frame in rows:
+            enemy.image = self.death_clip.frames[frame] if dying else self.walk_clips[facing].frames[frame]
+            enemy.rect.topleft = (x, y)
+            enemy.previous_position = (previous_x, previous_y)
+        return views